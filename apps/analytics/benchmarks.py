@@ -0,0 +1,27 @@
+# Save as: apps/analytics/benchmarks.py
+
+import numpy as np
+
+
+def synthetic_enrollments(n_users, n_courses, per_user, n_cohorts=50, seed=0):
+    """Yield (student_id, course_id, progress) rows sorted by student, like the training query
+    
+    Users are split into cohorts that each favour their own slice of the
+    catalogue on top of a global long-tail popularity, which gives the
+    neighbour search real structure to find.
+    """
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, n_courses + 1) ** 0.8
+    cohort_courses = [rng.choice(n_courses, size=max(1, n_courses // n_cohorts), replace=False)
+                      for _ in range(n_cohorts)]
+    
+    for student_id in range(1, n_users + 1):
+        weights = popularity.copy()
+        weights[cohort_courses[student_id % n_cohorts]] *= 50
+        weights /= weights.sum()
+        
+        k = min(n_courses, max(1, rng.poisson(per_user)))
+        courses = np.sort(rng.choice(n_courses, size=k, replace=False, p=weights)) + 1
+        progress = rng.uniform(0, 100, size=k)
+        for course_id, value in zip(courses.tolist(), progress.tolist()):
+            yield student_id, course_id, value
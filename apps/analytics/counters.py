@@ -0,0 +1,79 @@
+# Save as: apps/analytics/counters.py
+
+from django.db.models import Count, F, FloatField, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.utils import timezone
+from apps.courses.models import Review
+from .models import CourseAnalytics
+
+
+def ratio(numerator, denominator, scale=1):
+    # Cast first so PostgreSQL does not fall back to integer division
+    return Cast(numerator, FloatField()) * scale / Greatest(denominator, 1)
+
+
+def bump_course_analytics(course_id, create=True, **changes):
+    """Apply F() expressions to a course's analytics row in one UPDATE, creating the row on first use
+    
+    Expressions on the right-hand side see the values from before the update,
+    so derived columns have to repeat the increment they depend on.
+    """
+    changes['last_updated'] = timezone.now()
+    
+    if not CourseAnalytics.objects.filter(course_id=course_id).update(**changes) and create:
+        CourseAnalytics.objects.get_or_create(course_id=course_id)
+        CourseAnalytics.objects.filter(course_id=course_id).update(**changes)
+
+
+def record_enrollment(course_id):
+    bump_course_analytics(
+        course_id,
+        total_enrollments=F('total_enrollments') + 1,
+        average_completion_rate=ratio(F('total_completions'), F('total_enrollments') + 1, 100),
+    )
+
+
+def remove_enrollment(course_id, completed):
+    """Undo record_enrollment, and record_completion too for a completed enrollment"""
+    completions = 1 if completed else 0
+    bump_course_analytics(
+        course_id,
+        # Runs on cascades from a course delete as well, so never create the row
+        create=False,
+        total_enrollments=Greatest(F('total_enrollments') - 1, 0),
+        total_completions=Greatest(F('total_completions') - completions, 0),
+        average_completion_rate=ratio(F('total_completions') - completions, F('total_enrollments') - 1, 100),
+    )
+
+
+def record_completion(course_id):
+    bump_course_analytics(
+        course_id,
+        total_completions=F('total_completions') + 1,
+        average_completion_rate=ratio(F('total_completions') + 1, F('total_enrollments'), 100),
+    )
+
+
+def record_review(course_id, rating, delta=1):
+    """Add (delta=1) or remove (delta=-1) a review rating"""
+    bump_course_analytics(
+        course_id,
+        # A removal may run while the course itself is being deleted, so never create the row then
+        create=delta > 0,
+        rating_count=F('rating_count') + delta,
+        rating_total=F('rating_total') + delta * rating,
+        average_rating=ratio(F('rating_total') + delta * rating, F('rating_count') + delta),
+    )
+
+
+def recount_reviews(course_id):
+    """Recompute the rating columns from the course's reviews, for edits that have no delta at hand"""
+    reviews = Review.objects.filter(course_id=course_id).order_by().values('course')
+    count = Coalesce(Subquery(reviews.annotate(count=Count('id')).values('count')), 0)
+    total = Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0)
+    # Subqueries keep the recount and the write in one statement
+    bump_course_analytics(course_id, rating_count=count, rating_total=total, average_rating=ratio(total, count))
+
+
+def record_revenue(course_id, amount):
+    bump_course_analytics(course_id, total_revenue=F('total_revenue') + amount)
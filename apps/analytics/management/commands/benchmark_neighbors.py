@@ -0,0 +1,69 @@
+# Save as: apps/analytics/management/commands/benchmark_neighbors.py
+
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from sklearn.preprocessing import StandardScaler
+
+from apps.analytics.benchmarks import synthetic_enrollments
+from apps.analytics.ml_engine import build_interaction_matrix
+from apps.analytics.neighbors import ExactNeighbors, RandomProjectionLSH
+
+
+class Command(BaseCommand):
+    help = 'Compare recall and latency of the LSH neighbour backend against exact kNN on synthetic enrollments'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--courses', type=int, default=2000)
+        parser.add_argument('--per-user', type=int, default=8)
+        parser.add_argument('--queries', type=int, default=1000)
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--tables', type=int, nargs='+', default=[16, 32, 64])
+        parser.add_argument('--bits', type=int, nargs='+', default=[12, 13, 14])
+        parser.add_argument('--multi-probe', action='store_true')
+        parser.add_argument('--max-candidates', type=int, default=4000)
+    
+    def handle(self, *args, **options):
+        k = options['k']
+        matrix, user_ids, course_ids = build_interaction_matrix(
+            synthetic_enrollments(options['users'], options['courses'], options['per_user'])
+        )
+        matrix = StandardScaler(with_mean=False).fit_transform(matrix)
+        
+        rng = np.random.default_rng(1)
+        queries = matrix[rng.choice(matrix.shape[0], size=min(options['queries'], matrix.shape[0]), replace=False)]
+        self.stdout.write(f'{matrix.shape[0]} users x {matrix.shape[1]} courses, {matrix.nnz} enrollments, '
+                          f'{queries.shape[0]} queries, k={k}')
+        
+        exact, build_seconds = self.build(ExactNeighbors(n_neighbors=k), matrix)
+        truth, query_seconds = self.query(exact, queries, k)
+        
+        self.stdout.write(f"{'backend':<20}{'build s':>9}{'ms/query':>10}{'recall@k':>10}")
+        self.report('exact', build_seconds, query_seconds, queries.shape[0], 1.0)
+        
+        for n_tables in options['tables']:
+            for n_bits in options['bits']:
+                index, build_seconds = self.build(
+                    RandomProjectionLSH(n_neighbors=k, n_tables=n_tables, n_bits=n_bits,
+                                        multi_probe=options['multi_probe'],
+                                        max_candidates=options['max_candidates']),
+                    matrix
+                )
+                found, query_seconds = self.query(index, queries, k)
+                recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(truth.tolist(), found.tolist())])
+                self.report(f'lsh t={n_tables} b={n_bits}', build_seconds, query_seconds, queries.shape[0], recall)
+    
+    def build(self, index, matrix):
+        started = time.perf_counter()
+        index.fit(matrix)
+        return index, time.perf_counter() - started
+    
+    def query(self, index, queries, k):
+        started = time.perf_counter()
+        distances, indices = index.kneighbors(queries, n_neighbors=k)
+        return indices, time.perf_counter() - started
+    
+    def report(self, name, build_seconds, query_seconds, n_queries, recall):
+        self.stdout.write(f'{name:<20}{build_seconds:>9.2f}{query_seconds / n_queries * 1000:>10.3f}{recall:>10.3f}')
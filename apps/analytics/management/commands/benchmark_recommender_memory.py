@@ -0,0 +1,80 @@
+# Save as: apps/analytics/management/commands/benchmark_recommender_memory.py
+
+import multiprocessing
+import resource
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.analytics.benchmarks import synthetic_enrollments
+from apps.analytics.ml_engine import CourseRecommendationEngine, build_interaction_matrix
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_case(n_users, n_courses, per_user, dense, queue):
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    
+    if dense:
+        import pandas as pd
+        df = pd.DataFrame(synthetic_enrollments(n_users, n_courses, per_user),
+                          columns=['student_id', 'course_id', 'progress_percentage'])
+        matrix = df.pivot_table(index='student_id', columns='course_id',
+                                values='progress_percentage', fill_value=0)
+        nnz = int((matrix.values != 0).sum())
+    else:
+        matrix, user_ids, course_ids = build_interaction_matrix(
+            synthetic_enrollments(n_users, n_courses, per_user)
+        )
+        CourseRecommendationEngine().fit(matrix, user_ids, course_ids)
+        nnz = matrix.nnz
+    
+    queue.put({
+        'nnz': nnz,
+        'seconds': time.perf_counter() - started,
+        'peak_mb': peak_rss_mb(),
+        'delta_mb': peak_rss_mb() - baseline,
+    })
+
+
+class Command(BaseCommand):
+    help = 'Measure peak RSS of building and fitting the recommendation matrix at several sizes'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', default=['10000x500', '100000x2000', '500000x5000'],
+                            help='Matrix sizes as <users>x<courses>')
+        parser.add_argument('--per-user', type=int, default=8, help='Average enrollments per user')
+        parser.add_argument('--compare-dense', action='store_true',
+                            help='Also run the old dense pivot_table path (only use on small sizes)')
+    
+    def handle(self, *args, **options):
+        try:
+            sizes = [tuple(int(part) for part in size.lower().split('x')) for size in options['sizes']]
+        except ValueError:
+            raise CommandError('Sizes must look like 100000x2000')
+        
+        modes = [False, True] if options['compare_dense'] else [False]
+        # Every case runs in a forked child so the peak RSS of one does not leak into the next;
+        # the child inherits the configured Django app registry from this process
+        ctx = multiprocessing.get_context('fork')
+        
+        self.stdout.write(f"{'mode':<7}{'users':>10}{'courses':>9}{'nnz':>12}{'dense MB':>11}"
+                          f"{'peak MB':>10}{'delta MB':>10}{'seconds':>9}")
+        for n_users, n_courses in sizes:
+            for dense in modes:
+                queue = ctx.Queue()
+                proc = ctx.Process(target=run_case, args=(n_users, n_courses, options['per_user'], dense, queue))
+                proc.start()
+                result = queue.get()
+                proc.join()
+                
+                dense_mb = n_users * n_courses * 8 / 1024 / 1024
+                self.stdout.write(
+                    f"{'dense' if dense else 'sparse':<7}{n_users:>10}{n_courses:>9}{result['nnz']:>12}"
+                    f"{dense_mb:>11.0f}{result['peak_mb']:>10.0f}{result['delta_mb']:>10.0f}"
+                    f"{result['seconds']:>9.2f}"
+                )
@@ -0,0 +1,45 @@
+# Save as: apps/analytics/management/commands/generate_recommendations.py
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.analytics.ml_engine import get_engine, refresh_user_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Score recommendations for many users in batches and store them in bulk'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, nargs='*',
+                            help='User ids to score (default: every user in the current model)')
+        parser.add_argument('-n', '--recommendations', type=int, default=10)
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--output', help='Write JSON lines to this file instead of UserRecommendation')
+    
+    def handle(self, *args, **options):
+        engine = get_engine()
+        if engine is None:
+            raise CommandError('No recommendation model has been published yet; run train_recommendation_model first')
+        
+        user_ids = options['users'] or engine.user_ids.tolist()
+        n = options['recommendations']
+        
+        if not options['output']:
+            written = refresh_user_recommendations(engine, user_ids, n, chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f'Stored recommendations for {written} of {len(user_ids)} users'))
+            return
+        
+        written = 0
+        with open(options['output'], 'w') as output:
+            for results in engine.recommend_many(user_ids, n, chunk_size=options['chunk_size']):
+                for user_id, recommendations in results.items():
+                    if recommendations:
+                        output.write(json.dumps({
+                            'user_id': user_id,
+                            'course_ids': [course_id for course_id, score in recommendations],
+                            'scores': [round(score, 4) for course_id, score in recommendations],
+                        }) + '\n')
+                        written += 1
+        
+        self.stdout.write(self.style.SUCCESS(f"Wrote recommendations for {written} of {len(user_ids)} users to {options['output']}"))
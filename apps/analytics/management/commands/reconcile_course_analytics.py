@@ -0,0 +1,62 @@
+# Save as: apps/analytics/management/commands/reconcile_course_analytics.py
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.analytics.models import CourseAnalytics
+from apps.courses.models import Course, Enrollment, Review
+from apps.payments.models import Transaction
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized CourseAnalytics counters from source tables'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        # One grouped query per source table for all courses
+        enrollments = {
+            row['course_id']: row for row in Enrollment.objects.order_by().values('course_id').annotate(
+                total=Count('id'), completions=Count('id', filter=Q(completed=True))
+            )
+        }
+        reviews = {
+            row['course_id']: row for row in Review.objects.order_by().values('course_id').annotate(
+                count=Count('id'), total=Sum('rating')
+            )
+        }
+        revenue = dict(
+            Transaction.objects.filter(status='completed', course__isnull=False).order_by().values('course_id').annotate(
+                revenue=Sum('amount')
+            ).values_list('course_id', 'revenue')
+        )
+        
+        now = timezone.now()
+        rows = []
+        for course_id in Course.objects.values_list('id', flat=True).iterator():
+            enrolled = enrollments.get(course_id, {'total': 0, 'completions': 0})
+            rated = reviews.get(course_id, {'count': 0, 'total': 0})
+            rows.append(CourseAnalytics(
+                course_id=course_id,
+                total_enrollments=enrolled['total'],
+                total_completions=enrolled['completions'],
+                average_completion_rate=enrolled['completions'] * 100 / enrolled['total'] if enrolled['total'] else 0,
+                rating_count=rated['count'],
+                rating_total=rated['total'] or 0,
+                average_rating=(rated['total'] or 0) / rated['count'] if rated['count'] else 0,
+                total_revenue=revenue.get(course_id) or 0,
+                last_updated=now,
+            ))
+        
+        CourseAnalytics.objects.bulk_create(
+            rows,
+            batch_size=options['batch_size'],
+            update_conflicts=True,
+            unique_fields=['course'],
+            update_fields=['total_enrollments', 'total_completions', 'average_completion_rate', 'rating_count',
+                           'rating_total', 'average_rating', 'total_revenue', 'last_updated'],
+        )
+        
+        self.stdout.write(self.style.SUCCESS(f'Reconciled analytics for {len(rows)} courses'))
@@ -1,135 +1,301 @@
 ```python
+import os
+import threading
+from array import array
+from pathlib import Path
+
 import numpy as np
-import pandas as pd
-from sklearn.neighbors import NearestNeighbors
+from scipy import sparse
 from sklearn.preprocessing import StandardScaler
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
 from apps.courses.models import Course, Enrollment
+from .neighbors import get_neighbor_backend
 import joblib
 
 User = get_user_model()
 
+MODEL_VERSION_CACHE_KEY = 'recommender:current_version'
+MODEL_FILE_PREFIX = 'recommender-'
+CURRENT_VERSION_FILE = 'CURRENT'
+QUERY_CHUNK_SIZE = 20000
+
+
+def build_interaction_matrix(rows):
+    """Build a CSR user x course matrix from (student_id, course_id, progress) rows
+    
+    Rows must arrive grouped by student_id: a new matrix row starts whenever
+    the student changes, so no user id lookup is needed. Course columns are
+    assigned in first-seen order through a dict. Returns (matrix, user_ids, course_ids)
+    where user_ids/course_ids map matrix rows/columns back to primary keys.
+    """
+    user_ids = array('q')
+    course_index = {}
+    row_idx = array('i')
+    col_idx = array('i')
+    values = array('f')
+    
+    last_user = None
+    for student_id, course_id, progress in rows:
+        if student_id != last_user:
+            user_ids.append(student_id)
+            last_user = student_id
+        row_idx.append(len(user_ids) - 1)
+        col_idx.append(course_index.setdefault(course_id, len(course_index)))
+        values.append(progress or 0.0)
+    
+    if not values:
+        return None, None, None
+    
+    matrix = sparse.csr_matrix(
+        (np.frombuffer(values, dtype=np.float32),
+         (np.frombuffer(row_idx, dtype=np.int32), np.frombuffer(col_idx, dtype=np.int32))),
+        shape=(len(user_ids), len(course_index)),
+    )
+    course_ids = np.fromiter(course_index.keys(), dtype=np.int64, count=len(course_index))
+    
+    return matrix, np.frombuffer(user_ids, dtype=np.int64), course_ids
+
+
 class CourseRecommendationEngine:
-    def __init__(self):
+    def __init__(self, neighbor_backend=None):
+        self.neighbor_backend = neighbor_backend or settings.RECOMMENDER_NEIGHBOR_BACKEND
         self.model = None
-        self.scaler = StandardScaler()
+        # Centering would densify the sparse matrix, so only scale to unit variance
+        self.scaler = StandardScaler(with_mean=False)
+        self.matrix = None
+        self.user_ids = None
+        self.course_ids = None
+        self.version = None
     
     def prepare_data(self):
-        """Prepare user-course interaction matrix"""
-        enrollments = Enrollment.objects.all().values('student_id', 'course_id', 'progress_percentage', 'completed')
-        
-        if not enrollments:
-            return None, None
-        
-        df = pd.DataFrame(enrollments)
-        
-        # Create user-course matrix
-        matrix = df.pivot_table(
-            index='student_id',
-            columns='course_id',
-            values='progress_percentage',
-            fill_value=0
-        )
+        """Prepare sparse user-course interaction matrix"""
+        rows = Enrollment.objects.order_by('student_id', 'course_id').values_list(
+            'student_id', 'course_id', 'progress_percentage'
+        ).iterator(chunk_size=QUERY_CHUNK_SIZE)
         
-        return matrix, df
+        return build_interaction_matrix(rows)
     
     def train(self):
         """Train collaborative filtering model"""
-        matrix, df = self.prepare_data()
+        matrix, user_ids, course_ids = self.prepare_data()
         
         if matrix is None:
             return False
         
+        self.fit(matrix, user_ids, course_ids)
+        return True
+    
+    def fit(self, matrix, user_ids, course_ids):
+        """Fit scaler and neighbour index on an already built interaction matrix"""
         # Normalize data
         matrix_normalized = self.scaler.fit_transform(matrix)
         
-        # Train KNN model
-        self.model = NearestNeighbors(n_neighbors=5, metric='cosine')
+        # Train KNN model with the configured exact or approximate backend
+        self.model = get_neighbor_backend(self.neighbor_backend, n_neighbors=min(5, matrix.shape[0]))
         self.model.fit(matrix_normalized)
         
-        return True
+        self.matrix = matrix
+        self.user_ids = user_ids
+        self.course_ids = course_ids
+    
+    def save(self, version=None):
+        """Write the trained artifacts to the model directory as a new version"""
+        if self.model is None:
+            raise ValueError('Cannot save an untrained recommendation model')
+        
+        version = version or timezone.now().strftime('%Y%m%d%H%M%S')
+        model_dir = Path(settings.RECOMMENDER_MODEL_DIR)
+        model_dir.mkdir(parents=True, exist_ok=True)
+        
+        artifacts = {
+            'version': version,
+            'neighbor_backend': self.neighbor_backend,
+            'scaler': self.scaler,
+            'model': self.model,
+            'matrix': self.matrix,
+            'user_ids': self.user_ids,
+            'course_ids': self.course_ids,
+        }
+        path = model_dir / f'{MODEL_FILE_PREFIX}{version}.joblib'
+        tmp_path = path.with_suffix('.tmp')
+        joblib.dump(artifacts, tmp_path)
+        os.replace(tmp_path, path)
+        
+        self.version = version
+        return version
+    
+    @classmethod
+    def load(cls, version):
+        """Load a previously saved model version"""
+        path = Path(settings.RECOMMENDER_MODEL_DIR) / f'{MODEL_FILE_PREFIX}{version}.joblib'
+        artifacts = joblib.load(path)
+        
+        engine = cls(neighbor_backend=artifacts['neighbor_backend'])
+        engine.scaler = artifacts['scaler']
+        engine.model = artifacts['model']
+        engine.matrix = artifacts['matrix']
+        engine.user_ids = artifacts['user_ids']
+        engine.course_ids = artifacts['course_ids']
+        engine.version = artifacts['version']
+        return engine
     
     def get_recommendations(self, user_id, n_recommendations=5):
         """Get course recommendations for a user"""
-        matrix, df = self.prepare_data()
+        recommendations = self.recommend_users([user_id], n_recommendations).get(user_id)
         
-        if matrix is None or user_id not in matrix.index:
+        if not recommendations:
             # Return popular courses for new users
             return self.get_popular_courses(n_recommendations)
         
-        # Get user vector
-        user_vector = matrix.loc[user_id].values.reshape(1, -1)
-        user_vector_normalized = self.scaler.transform(user_vector)
+        course_ids = [course_id for course_id, score in recommendations]
+        courses = Course.objects.in_bulk(course_ids)
+        return [courses[course_id] for course_id in course_ids if course_id in courses]
+    
+    def user_vectors(self, user_ids):
+        """Build current interaction rows for users from the database
         
-        # Find similar users
-        distances, indices = self.model.kneighbors(user_vector_normalized)
+        Returns (vectors, enrolled) where vectors is a CSR matrix in the model's
+        course space with one row per user id, and enrolled maps each user id to
+        the set of courses it is enrolled in (including courses newer than the model).
+        """
+        if getattr(self, '_course_columns', None) is None:
+            self._course_columns = {course_id: col for col, course_id in enumerate(self.course_ids.tolist())}
         
-        # Get courses from similar users
-        similar_users = matrix.index[indices[0][1:]]  # Exclude the user itself
+        row_of = {user_id: row for row, user_id in enumerate(user_ids)}
+        enrolled = {user_id: set() for user_id in user_ids}
+        rows, cols, values = [], [], []
         
-        # Find courses that similar users liked but current user hasn't taken
-        enrolled_courses = set(Enrollment.objects.filter(student_id=user_id).values_list('course_id', flat=True))
+        for student_id, course_id, progress in Enrollment.objects.filter(student_id__in=user_ids).values_list(
+            'student_id', 'course_id', 'progress_percentage'
+        ):
+            enrolled[student_id].add(course_id)
+            col = self._course_columns.get(course_id)
+            if col is not None:
+                rows.append(row_of[student_id])
+                cols.append(col)
+                values.append(progress or 0.0)
         
-        recommended_courses = []
-        for similar_user in similar_users:
-            user_courses = matrix.loc[similar_user]
-            top_courses = user_courses[user_courses > 50].sort_values(ascending=False)
+        vectors = sparse.csr_matrix(
+            (np.asarray(values, dtype=np.float32), (rows, cols)),
+            shape=(len(user_ids), len(self.course_ids)),
+        )
+        return vectors, enrolled
+    
+    def recommend_users(self, user_ids, n_recommendations=5, n_neighbors=5):
+        """Score courses for the given users against the trained model
+        
+        Returns {user_id: [(course_id, score), ...]} for users that got at least one
+        recommendation. See recommend_many for the scoring.
+        """
+        results = {}
+        for chunk in self.recommend_many(user_ids, n_recommendations, n_neighbors=n_neighbors):
+            results.update((user_id, recommendations) for user_id, recommendations in chunk.items() if recommendations)
+        return results
+    
+    def liked_matrix(self):
+        """Neighbour contribution matrix: progress / 100 where a course is more than half done, else 0"""
+        if getattr(self, '_liked', None) is None:
+            liked = self.matrix.astype(np.float32, copy=True)
+            liked.data = np.where(liked.data > 50, liked.data / 100, 0).astype(np.float32)
+            liked.eliminate_zeros()
+            self._liked = liked
+        return self._liked
+    
+    def recommend_many(self, user_ids, n_recommendations=10, n_neighbors=5, chunk_size=1000):
+        """Yield {user_id: [(course_id, score), ...]} for successive chunks of users
+        
+        Each chunk runs one batched kneighbors call. Neighbour similarities form a
+        sparse users x neighbours weight matrix, so the score of every course is
+        weights @ liked_matrix(): the sum over neighbours of cosine similarity times
+        progress on courses they finished more than half of. Courses the user is
+        enrolled in are masked out. Every user of the chunk appears in the result,
+        with an empty list when there is nothing to recommend.
+        """
+        if self.model is None:
+            return
+        
+        user_ids = list(user_ids)
+        liked = self.liked_matrix()
+        n_users, n_courses = liked.shape
+        n_recommendations = min(n_recommendations, n_courses)
+        # Ask for one extra neighbour since a user already in the model finds itself first
+        n_neighbors = min(n_neighbors + 1, n_users)
+        
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            results = {user_id: [] for user_id in chunk}
             
-            for course_id, score in top_courses.items():
-                if course_id not in enrolled_courses and course_id not in recommended_courses:
-                    recommended_courses.append(course_id)
-                
-                if len(recommended_courses) >= n_recommendations:
-                    break
+            vectors, enrolled = self.user_vectors(chunk)
+            active = np.flatnonzero(np.diff(vectors.indptr))
+            if not len(active) or not n_recommendations:
+                yield results
+                continue
             
-            if len(recommended_courses) >= n_recommendations:
-                break
-        
-        return Course.objects.filter(id__in=recommended_courses[:n_recommendations])
+            vectors = vectors[active]
+            distances, indices = self.model.kneighbors(self.scaler.transform(vectors), n_neighbors=n_neighbors)
+            
+            weights = sparse.csr_matrix(
+                ((1 - distances).ravel(), (np.repeat(np.arange(len(active)), indices.shape[1]), indices.ravel())),
+                shape=(len(active), n_users),
+            )
+            scores = (weights @ liked).toarray()
+            
+            # Mask courses the user already takes; explicit zeros count as enrollments too
+            scores[np.repeat(np.arange(len(active)), np.diff(vectors.indptr)), vectors.indices] = 0
+            
+            top = np.argpartition(-scores, n_recommendations - 1, axis=1)[:, :n_recommendations]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            
+            for row, position in enumerate(active.tolist()):
+                positive = top_scores[row] > 0
+                results[chunk[position]] = list(zip(
+                    self.course_ids[top[row][positive]].tolist(),
+                    top_scores[row][positive].tolist(),
+                ))
+            
+            yield results
     
     def get_popular_courses(self, n=5):
         """Get most popular courses"""
-        from django.db.models import Count
-        
-        popular = Course.objects.annotate(
-            enrollment_count=Count('enrollments')
-        ).filter(status='published').order_by('-enrollment_count')[:n]
+        popular = Course.objects.filter(status='published').select_related(
+            'instructor', 'category'
+        ).with_stats().order_by('-enrollment_count')[:n]
         
         return popular
     
     def get_personalized_learning_path(self, user_id, course_id):
         """Adjust learning path based on user performance"""
+        from django.db.models import Avg, Count, F, FloatField, Q, Value
+        from django.db.models.functions import Coalesce
         from apps.assessments.models import QuizAttempt
-        from apps.courses.models import Module, Lesson
         
-        # Get user's quiz performance
-        attempts = QuizAttempt.objects.filter(
+        # Average quiz score in the database; unscored attempts count as 0
+        avg_score = QuizAttempt.objects.filter(
             student_id=user_id,
             quiz__course_id=course_id
-        ).order_by('-completed_at')
+        ).aggregate(
+            avg=Avg(Coalesce('score', Value(0.0), output_field=FloatField()))
+        )['avg']
         
-        if not attempts.exists():
-            return self.get_standard_path(course_id)
+        learning_path = self.get_standard_path(course_id)
         
-        # Calculate average score
-        avg_score = sum([a.score for a in attempts if a.score]) / len(attempts)
+        if avg_score is None:
+            return learning_path
         
-        # Adjust difficulty
-        modules = Module.objects.filter(course_id=course_id).prefetch_related('lessons')
-        
-        learning_path = []
-        for module in modules:
-            lessons = list(module.lessons.all())
-            
-            if avg_score < 60:
-                # Struggling: Add more foundational content
-                learning_path.extend([l for l in lessons if l.is_preview or 'intro' in l.title.lower()])
-            elif avg_score > 85:
-                # Advanced: Skip basics, focus on advanced
-                learning_path.extend([l for l in lessons if 'advanced' in l.title.lower() or l.order > len(lessons)/2])
-            else:
-                # Normal progression
-                learning_path.extend(lessons)
+        if avg_score < 60:
+            # Struggling: Add more foundational content
+            learning_path = learning_path.filter(Q(is_preview=True) | Q(title__icontains='intro'))
+        elif avg_score > 85:
+            # Advanced: Skip basics, focus on advanced lessons and the second half of each module
+            learning_path = learning_path.annotate(
+                module_lesson_count=Count('module__lessons')
+            ).filter(Q(title__icontains='advanced') | Q(order__gt=F('module_lesson_count') / 2.0))
         
         return learning_path
     
@@ -137,4 +303,102 @@ class CourseRecommendationEngine:
         """Get standard learning path"""
         from apps.courses.models import Lesson
         return Lesson.objects.filter(module__course_id=course_id).order_by('module__order', 'order')
+
+
+def learning_path_cache_key(user_id, course_id):
+    return f'learning_path:{user_id}:{course_id}'
+
+
+def publish_model(version):
+    """Mark a saved model version as current and drop old versions"""
+    model_dir = Path(settings.RECOMMENDER_MODEL_DIR)
+    pointer = model_dir / CURRENT_VERSION_FILE
+    tmp_pointer = pointer.with_suffix('.tmp')
+    tmp_pointer.write_text(version)
+    os.replace(tmp_pointer, pointer)
+    
+    cache.set(MODEL_VERSION_CACHE_KEY, version, timeout=None)
+    
+    # Keep the most recent versions around so running workers can finish swapping
+    saved = sorted(model_dir.glob(f'{MODEL_FILE_PREFIX}*.joblib'), reverse=True)
+    for old in saved[settings.RECOMMENDER_KEEP_VERSIONS:]:
+        old.unlink(missing_ok=True)
+
+
+def get_current_version():
+    """Return the published model version, or None if nothing was trained yet"""
+    version = cache.get(MODEL_VERSION_CACHE_KEY)
+    if version:
+        return version
+    
+    pointer = Path(settings.RECOMMENDER_MODEL_DIR) / CURRENT_VERSION_FILE
+    if not pointer.exists():
+        return None
+    
+    version = pointer.read_text().strip()
+    cache.set(MODEL_VERSION_CACHE_KEY, version, timeout=None)
+    return version
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the process-wide engine, hot-swapping it when a newer version is published"""
+    global _engine
+    
+    version = get_current_version()
+    if version is None:
+        return None
+    
+    if _engine is not None and _engine.version == version:
+        return _engine
+    
+    with _engine_lock:
+        if _engine is None or _engine.version != version:
+            try:
+                _engine = CourseRecommendationEngine.load(version)
+            except FileNotFoundError:
+                # Published on another host or pruned; keep serving what we have
+                return _engine
+    
+    return _engine
+
+
+def refresh_user_recommendations(engine, user_ids, n_recommendations=10, chunk_size=1000):
+    """Recompute and store top-N recommendations for the given users in bulk"""
+    from .models import UserRecommendation
+    
+    refreshed = 0
+    
+    for results in engine.recommend_many(list(user_ids), n_recommendations, chunk_size=chunk_size):
+        now = timezone.now()
+        
+        rows = [
+            UserRecommendation(
+                user_id=user_id,
+                course_ids=[course_id for course_id, score in recommendations],
+                scores=[round(score, 4) for course_id, score in recommendations],
+                model_version=engine.version or '',
+                computed_at=now,
+            )
+            for user_id, recommendations in results.items()
+            if recommendations
+        ]
+        UserRecommendation.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['course_ids', 'scores', 'model_version', 'computed_at'],
+        )
+        
+        # Users that lost all their signal fall back to popular courses in the view
+        stale = [user_id for user_id, recommendations in results.items() if not recommendations]
+        if stale:
+            UserRecommendation.objects.filter(user_id__in=stale).delete()
+        
+        refreshed += len(rows)
+    
+    return refreshed
 ```
@@ -11,6 +11,8 @@ class CourseAnalytics(models.Model):
     total_completions = models.IntegerField(default=0)
     average_completion_rate = models.FloatField(default=0.0)
     average_rating = models.FloatField(default=0.0)
+    rating_count = models.IntegerField(default=0)
+    rating_total = models.IntegerField(default=0)
     total_revenue = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     last_updated = models.DateTimeField(auto_now=True)
     
@@ -51,4 +53,18 @@ class LessonAnalytics(models.Model):
     
     def __str__(self):
         return f"Analytics: {self.lesson.title}"
+
+
+class UserRecommendation(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='recommendation')
+    course_ids = models.JSONField(default=list)
+    scores = models.JSONField(default=list)
+    model_version = models.CharField(max_length=32, blank=True)
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'user_recommendations'
+    
+    def __str__(self):
+        return f"Recommendations: {self.user.email}"
 ```
@@ -0,0 +1,55 @@
+# Save as: apps/analytics/signals.py
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.assessments.models import QuizAttempt
+from apps.courses.models import Enrollment, Review
+from .counters import record_enrollment, record_review, recount_reviews, remove_enrollment
+from .ml_engine import learning_path_cache_key
+from .tasks import RELATED_COURSES_DEBOUNCE_SECONDS, RELATED_COURSES_PENDING_KEY, update_course_similarity
+
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment(sender, instance, created, **kwargs):
+    if created:
+        record_enrollment(instance.course_id)
+
+
+@receiver(post_delete, sender=Enrollment)
+def uncount_enrollment(sender, instance, **kwargs):
+    remove_enrollment(instance.course_id, instance.completed)
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        record_review(instance.course_id, instance.rating)
+    elif update_fields is None or 'rating' in update_fields:
+        # The old rating is gone by now, so rebuild the course's totals
+        recount_reviews(instance.course_id)
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, **kwargs):
+    record_review(instance.course_id, instance.rating, delta=-1)
+
+
+@receiver(post_save, sender=Enrollment)
+def schedule_related_courses_update(sender, instance, created, **kwargs):
+    if not created:
+        return
+    
+    # Coalesce a burst of enrollments into one refresh per course
+    if cache.add(RELATED_COURSES_PENDING_KEY.format(instance.course_id), True, RELATED_COURSES_DEBOUNCE_SECONDS):
+        transaction.on_commit(lambda: update_course_similarity.apply_async(
+            (instance.course_id,), countdown=RELATED_COURSES_DEBOUNCE_SECONDS
+        ))
+
+
+@receiver(post_save, sender=QuizAttempt)
+def invalidate_learning_path(sender, instance, **kwargs):
+    # The path depends on the average score, which only moves when an attempt is finished or regraded
+    if instance.completed_at is not None:
+        cache.delete(learning_path_cache_key(instance.student_id, instance.quiz.course_id))
@@ -0,0 +1,114 @@
+# Save as: apps/analytics/similarity.py
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from django.core.cache import cache
+from apps.courses.models import Enrollment
+
+RELATED_COURSES_KEY = 'related_courses:{}'
+COURSE_NORMS_KEY = 'related_courses:norms'
+RELATED_COURSES_K = 20
+
+
+def enrollment_weights(progress):
+    """Every enrollment counts once, completing the course counts twice"""
+    return 1.0 + np.asarray(progress, dtype=np.float32) / 100
+
+
+def top_k(row_indices, row_scores, k):
+    if len(row_scores) > k:
+        keep = np.argpartition(-row_scores, k - 1)[:k]
+        row_indices, row_scores = row_indices[keep], row_scores[keep]
+    order = np.argsort(-row_scores, kind='stable')
+    return row_indices[order], row_scores[order]
+
+
+def build_course_similarity(matrix, course_ids, k=RELATED_COURSES_K):
+    """Compute the top-K cosine neighbours of every course column of a user x course matrix
+    
+    Returns ({course_id: [(related_id, score), ...]}, {course_id: column norm}).
+    """
+    weighted = matrix.astype(np.float32, copy=True)
+    weighted.data = enrollment_weights(weighted.data)
+    
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=0)).ravel())
+    similarity = (normalize(weighted, axis=0).T @ normalize(weighted, axis=0)).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    
+    related = {}
+    for col, course_id in enumerate(course_ids.tolist()):
+        start, end = similarity.indptr[col], similarity.indptr[col + 1]
+        indices, scores = top_k(similarity.indices[start:end], similarity.data[start:end], k)
+        related[course_id] = list(zip(course_ids[indices].tolist(), np.round(scores.astype(np.float64), 4).tolist()))
+    
+    return related, dict(zip(course_ids.tolist(), norms.tolist()))
+
+
+def rebuild_related_courses():
+    """Rebuild the whole related-courses index from Enrollment and publish it to the cache"""
+    from .ml_engine import CourseRecommendationEngine
+    
+    matrix, user_ids, course_ids = CourseRecommendationEngine().prepare_data()
+    if matrix is None:
+        return 0
+    
+    related, norms = build_course_similarity(matrix, course_ids)
+    cache.set_many({RELATED_COURSES_KEY.format(course_id): items for course_id, items in related.items()}, timeout=None)
+    cache.set(COURSE_NORMS_KEY, norms, timeout=None)
+    return len(related)
+
+
+def refresh_related_course(course_id, k=RELATED_COURSES_K):
+    """Recompute one course's neighbours after new enrollments and merge it into theirs
+    
+    Only the students of this course are read. Other courses' norms come from the
+    last full rebuild, so scores drift slightly until the next nightly run.
+    """
+    rows = list(Enrollment.objects.filter(
+        student__enrollments__course_id=course_id
+    ).values_list('student_id', 'course_id', 'progress_percentage'))
+    if not rows:
+        return []
+    
+    norms = cache.get(COURSE_NORMS_KEY) or {}
+    
+    students = {student_id: row for row, student_id in enumerate(sorted({r[0] for r in rows}))}
+    course_ids = sorted({r[1] for r in rows})
+    columns = {cid: col for col, cid in enumerate(course_ids)}
+    weighted = sparse.csc_matrix(
+        (enrollment_weights([r[2] for r in rows]),
+         ([students[r[0]] for r in rows], [columns[r[1]] for r in rows])),
+        shape=(len(students), len(course_ids)),
+    )
+    
+    # Every student here took this course, so its column norm is exact
+    target = weighted[:, columns[course_id]]
+    norms[course_id] = float(np.sqrt(target.multiply(target).sum()))
+    dots = np.asarray((weighted.T @ target).todense()).ravel()
+    
+    other_norms = np.array([norms.get(cid) or np.sqrt(weighted[:, col].multiply(weighted[:, col]).sum())
+                            for col, cid in enumerate(course_ids)], dtype=np.float32)
+    scores = dots / np.maximum(other_norms * norms[course_id], 1e-9)
+    scores[columns[course_id]] = 0
+    
+    candidates = np.flatnonzero(scores > 0)
+    indices, top_scores = top_k(candidates, scores[candidates], k)
+    items = list(zip(np.asarray(course_ids)[indices].tolist(), np.round(top_scores.astype(np.float64), 4).tolist()))
+    
+    # Keep the relation symmetric by inserting this course into its neighbours' lists
+    neighbour_keys = {RELATED_COURSES_KEY.format(related_id): related_id for related_id, score in items}
+    updates = {RELATED_COURSES_KEY.format(course_id): items}
+    for key, neighbour_items in cache.get_many(list(neighbour_keys)).items():
+        score = dict(items)[neighbour_keys[key]]
+        merged = [item for item in neighbour_items if item[0] != course_id] + [(course_id, score)]
+        updates[key] = sorted(merged, key=lambda item: -item[1])[:k]
+    
+    cache.set_many(updates, timeout=None)
+    cache.set(COURSE_NORMS_KEY, norms, timeout=None)
+    return items
+
+
+def get_related_course_ids(course_id, n=10):
+    return [related_id for related_id, score in (cache.get(RELATED_COURSES_KEY.format(course_id)) or [])[:n]]
@@ -0,0 +1,65 @@
+# Save as: apps/analytics/tasks.py
+
+from celery import shared_task
+from django.core.cache import cache
+from django.utils import timezone
+from apps.courses.models import Enrollment
+from .ml_engine import CourseRecommendationEngine, get_engine, publish_model, refresh_user_recommendations
+from .similarity import rebuild_related_courses, refresh_related_course
+
+RECOMMENDATIONS_REFRESHED_KEY = 'recommender:last_refresh'
+RELATED_COURSES_PENDING_KEY = 'related_courses:pending:{}'
+RELATED_COURSES_DEBOUNCE_SECONDS = 300
+
+
+@shared_task
+def train_recommendation_model():
+    """Train the recommendation model offline and publish it as the current version"""
+    engine = CourseRecommendationEngine()
+    
+    if not engine.train():
+        return None
+    
+    version = engine.save()
+    publish_model(version)
+    refresh_recommendations.delay(full=True)
+    return version
+
+
+@shared_task
+def refresh_recommendations(full=False):
+    """Refill the UserRecommendation table
+    
+    A full run rescores every user in the model. Otherwise only users whose
+    enrollments were created or updated since the previous run are rescored.
+    """
+    engine = get_engine()
+    if engine is None:
+        return 0
+    
+    started = timezone.now()
+    last_run = cache.get(RECOMMENDATIONS_REFRESHED_KEY)
+    
+    if full or last_run is None or last_run['version'] != engine.version:
+        user_ids = engine.user_ids.tolist()
+    else:
+        user_ids = Enrollment.objects.filter(
+            last_accessed__gte=last_run['at']
+        ).order_by().values_list('student_id', flat=True).distinct()
+    
+    refreshed = refresh_user_recommendations(engine, user_ids)
+    cache.set(RECOMMENDATIONS_REFRESHED_KEY, {'at': started, 'version': engine.version}, timeout=None)
+    return refreshed
+
+
+@shared_task
+def rebuild_course_similarity():
+    """Nightly full rebuild of the related-courses index"""
+    return rebuild_related_courses()
+
+
+@shared_task
+def update_course_similarity(course_id):
+    """Refresh one course's related courses after new enrollments"""
+    cache.delete(RELATED_COURSES_PENDING_KEY.format(course_id))
+    return len(refresh_related_course(course_id))
@@ -0,0 +1,76 @@
+# Save as: apps/analytics/tests.py
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from apps.courses.models import Course, Enrollment, Review
+
+User = get_user_model()
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class InstructorDashboardQueryCountTests(APITestCase):
+    """The instructor dashboard is one grouped query however many courses and students there are"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user(
+            email='instructor@example.com', username='instructor', password='password', role='instructor'
+        )
+    
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.instructor)
+    
+    def add_courses(self, courses, students):
+        # bulk_create skips the analytics signals, which are not under test here
+        start = Course.objects.count()
+        created = Course.objects.bulk_create([
+            Course(title=f'Course {i}', slug=f'course-{i}', description='Description', instructor=self.instructor)
+            for i in range(start, start + courses)
+        ])
+        start = User.objects.count()
+        learners = [
+            User.objects.create_user(email=f'student{i}@example.com', username=f'student{i}', password='password')
+            for i in range(start, start + students)
+        ]
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=course, completed=i % 2 == 0, progress_percentage=50)
+            for course in created for i, student in enumerate(learners)
+        ])
+        Review.objects.bulk_create([
+            Review(student=student, course=course, rating=5, comment='Great') for course in created for student in learners
+        ])
+    
+    def test_query_count_is_flat(self):
+        url = reverse('instructor-dashboard')
+        for courses, students in ((2, 3), (10, 12)):
+            self.add_courses(courses, students)
+            cache.clear()
+            
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data), Course.objects.filter(instructor=self.instructor).count())
+    
+    def test_cached_dashboard_skips_the_database(self):
+        self.add_courses(3, 4)
+        url = reverse('instructor-dashboard')
+        self.client.get(url)
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data), 3)
+    
+    def test_counts_are_per_course(self):
+        self.add_courses(2, 4)
+        response = self.client.get(reverse('instructor-dashboard'))
+        
+        for course in response.data:
+            self.assertEqual(course['total_enrollments'], 4)
+            self.assertEqual(course['completion_rate'], 50)
+            self.assertEqual(course['average_rating'], 5)
@@ -3,28 +3,37 @@ from rest_framework import generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg, Count, Sum
-from .models import CourseAnalytics, StudentEngagement
+from django.core.cache import cache
+from django.db.models import Avg, Count, FloatField, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+from datetime import timedelta
+from .models import CourseAnalytics, StudentEngagement, UserRecommendation
 from .serializers import CourseAnalyticsSerializer, StudentEngagementSerializer
-from .ml_engine import CourseRecommendationEngine
-from apps.courses.models import Course, Enrollment
+from .ml_engine import CourseRecommendationEngine, learning_path_cache_key
+from .similarity import get_related_course_ids
+from apps.courses.models import Course, Enrollment, Review
 from apps.courses.serializers import CourseListSerializer
 from apps.authentication.permissions import IsInstructorUser
 
+LEARNING_PATH_CACHE_TIMEOUT = 60 * 60
+INSTRUCTOR_DASHBOARD_CACHE_TIMEOUT = 60
+
+
 class CourseAnalyticsView(APIView):
     permission_classes = [IsInstructorUser]
     
     def get(self, request, course_id):
         course = get_object_or_404(Course, id=course_id, instructor=request.user)
         
-        enrollments = Enrollment.objects.filter(course=course)
+        # Counters are maintained incrementally; see apps.analytics.counters
+        counters = CourseAnalytics.objects.filter(course=course).first() or CourseAnalytics(course=course)
         
         analytics = {
-            'total_enrollments': enrollments.count(),
-            'total_completions': enrollments.filter(completed=True).count(),
-            'average_progress': enrollments.aggregate(Avg('progress_percentage'))['progress_percentage__avg'] or 0,
-            'average_rating': course.average_rating,
-            'completion_rate': (enrollments.filter(completed=True).count() / enrollments.count() * 100) if enrollments.count() > 0 else 0,
+            'total_enrollments': counters.total_enrollments,
+            'total_completions': counters.total_completions,
+            'average_progress': Enrollment.objects.filter(course=course).aggregate(Avg('progress_percentage'))['progress_percentage__avg'] or 0,
+            'average_rating': counters.average_rating,
+            'completion_rate': counters.average_completion_rate,
         }
         
         return Response(analytics)
@@ -49,53 +58,93 @@ class CourseRecommendationsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        engine = CourseRecommendationEngine()
+        # Recommendations are precomputed in bulk by the refresh_recommendations task
+        course_ids = UserRecommendation.objects.filter(user=request.user).values_list('course_ids', flat=True).first()
         
-        # Try to train and get personalized recommendations
-        if engine.train():
-            recommended_courses = engine.get_recommendations(request.user.id, n_recommendations=10)
+        if course_ids:
+            courses = Course.objects.select_related('instructor', 'category').with_stats().in_bulk(course_ids)
+            recommended_courses = [courses[course_id] for course_id in course_ids if course_id in courses]
         else:
             # Fallback to popular courses
-            recommended_courses = engine.get_popular_courses(n=10)
+            recommended_courses = CourseRecommendationEngine().get_popular_courses(n=10)
         
         serializer = CourseListSerializer(recommended_courses, many=True)
         return Response(serializer.data)
 
 
+class RelatedCoursesView(APIView):
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request, course_id):
+        # Neighbours come precomputed from the related-courses index in the cache
+        related_ids = get_related_course_ids(course_id, n=10)
+        
+        courses = Course.objects.filter(status='published').select_related(
+            'instructor', 'category'
+        ).with_stats().in_bulk(related_ids)
+        related_courses = [courses[related_id] for related_id in related_ids if related_id in courses]
+        
+        serializer = CourseListSerializer(related_courses, many=True)
+        return Response(serializer.data)
+
+
 class PersonalizedLearningPathView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, course_id):
-        engine = CourseRecommendationEngine()
-        learning_path = engine.get_personalized_learning_path(request.user.id, course_id)
+        # Cached until the student completes another quiz attempt in this course
+        cache_key = learning_path_cache_key(request.user.id, course_id)
+        data = cache.get(cache_key)
         
-        from apps.courses.serializers import LessonSerializer
-        serializer = LessonSerializer(learning_path, many=True)
-        return Response(serializer.data)
+        if data is None:
+            engine = CourseRecommendationEngine()
+            learning_path = engine.get_personalized_learning_path(request.user.id, course_id)
+            
+            from apps.courses.serializers import LessonSerializer
+            data = LessonSerializer(learning_path, many=True).data
+            cache.set(cache_key, data, LEARNING_PATH_CACHE_TIMEOUT)
+        
+        return Response(data)
 
 
 class InstructorDashboardView(APIView):
     permission_classes = [IsInstructorUser]
     
     def get(self, request):
-        courses = Course.objects.filter(instructor=request.user)
+        cache_key = f'instructor_dashboard:{request.user.id}'
+        dashboard_data = cache.get(cache_key)
+        if dashboard_data is not None:
+            return Response(dashboard_data)
+        
+        # One grouped query for all courses; the rating is a subquery so reviews do not multiply enrollment rows
+        ratings = Review.objects.filter(course=OuterRef('pk')).order_by().values('course').annotate(
+            avg=Avg('rating')
+        ).values('avg')
+        courses = Course.objects.filter(instructor=request.user).annotate(
+            enrollment_total=Count('enrollments'),
+            active_students=Count('enrollments', filter=Q(enrollments__last_accessed__gte=timezone.now() - timedelta(days=7))),
+            completed_students=Count('enrollments', filter=Q(enrollments__completed=True)),
+            average_progress=Avg('enrollments__progress_percentage'),
+            rating_avg=Subquery(ratings, output_field=FloatField()),
+        ).values(
+            'id', 'title', 'enrollment_total', 'active_students', 'completed_students', 'average_progress', 'rating_avg'
+        )
         
         dashboard_data = []
         for course in courses:
-            enrollments = Enrollment.objects.filter(course=course)
-            
             course_data = {
-                'course_id': course.id,
-                'course_title': course.title,
-                'total_enrollments': enrollments.count(),
-                'active_students': enrollments.filter(last_accessed__gte=timezone.now() - timedelta(days=7)).count(),
-                'completion_rate': (enrollments.filter(completed=True).count() / enrollments.count() * 100) if enrollments.count() > 0 else 0,
-                'average_progress': enrollments.aggregate(Avg('progress_percentage'))['progress_percentage__avg'] or 0,
-                'average_rating': course.average_rating,
+                'course_id': course['id'],
+                'course_title': course['title'],
+                'total_enrollments': course['enrollment_total'],
+                'active_students': course['active_students'],
+                'completion_rate': (course['completed_students'] / course['enrollment_total'] * 100) if course['enrollment_total'] > 0 else 0,
+                'average_progress': course['average_progress'] or 0,
+                'average_rating': course['rating_avg'] or 0,
             }
             
             dashboard_data.append(course_data)
         
+        cache.set(cache_key, dashboard_data, INSTRUCTOR_DASHBOARD_CACHE_TIMEOUT)
         return Response(dashboard_data)
 
 
@@ -103,9 +152,6 @@ class StudentDashboardView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        from datetime import timedelta
-        from django.utils import timezone
-        
         enrollments = Enrollment.objects.filter(student=request.user).select_related('course')
         
         dashboard_data = {
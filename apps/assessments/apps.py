@@ -6,3 +6,6 @@ class AssessmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.assessments'
     label = 'assessments'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,31 @@
+# Save as: apps/assessments/attempts.py
+
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from .models import QuizAttempt
+
+
+class MaxAttemptsReached(Exception):
+    """The student has used every attempt the quiz allows"""
+
+
+def start_attempt(quiz, student):
+    """Create the student's next attempt at a quiz
+    
+    The attempt number is reserved by the unique (quiz, student,
+    attempt_number) constraint: when two starts race for the same number, the
+    loser re-reads and tries the next one. Every retry means another attempt
+    was created, so the loop ends once max_attempts is reached.
+    """
+    while True:
+        latest = QuizAttempt.objects.filter(quiz=quiz, student=student).aggregate(
+            latest=Max('attempt_number')
+        )['latest'] or 0
+        if latest >= quiz.max_attempts:
+            raise MaxAttemptsReached
+        
+        try:
+            with transaction.atomic():
+                return QuizAttempt.objects.create(quiz=quiz, student=student, attempt_number=latest + 1)
+        except IntegrityError:
+            continue
@@ -0,0 +1,71 @@
+# Save as: apps/assessments/autograder.py
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import linear_kernel
+from .models import Answer, StudentAnswer
+
+# Similarity to the closest reference answer at or below REJECT earns nothing, at or above ACCEPT full points
+REJECT_SIMILARITY = 0.3
+ACCEPT_SIMILARITY = 0.8
+UPDATE_BATCH_SIZE = 1000
+
+
+def score_answers(references, answers):
+    """Similarity-based scores for many answers to one question
+    
+    Answers and references are embedded together as TF-IDF over character
+    n-grams, which tolerates typos and word order, and compared in one sparse
+    matrix product. Returns (scores, confidences) arrays in [0, 1]: the score
+    is the best similarity rescaled between REJECT_SIMILARITY and
+    ACCEPT_SIMILARITY, and the confidence is how far it sits from the middle.
+    """
+    if not references or not answers:
+        return np.zeros(len(answers)), np.zeros(len(answers))
+    
+    vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 4), sublinear_tf=True, lowercase=True)
+    matrix = vectorizer.fit_transform(list(references) + list(answers))
+    reference_vectors, answer_vectors = matrix[:len(references)], matrix[len(references):]
+    
+    # Rows are L2-normalized, so the dot product is the cosine similarity
+    similarity = linear_kernel(answer_vectors, reference_vectors).max(axis=1)
+    scores = np.clip((similarity - REJECT_SIMILARITY) / (ACCEPT_SIMILARITY - REJECT_SIMILARITY), 0.0, 1.0)
+    confidences = np.abs(scores - 0.5) * 2
+    return scores, confidences
+
+
+def suggest_grades(question_ids=None):
+    """Write suggested_points and suggestion_confidence for ungraded short answers
+    
+    Reference answers are the question's Answer rows marked correct. Questions
+    without any are skipped. Returns the number of answers scored.
+    """
+    references = {}
+    for question_id, text in Answer.objects.filter(
+        is_correct=True, question__question_type='short_answer'
+    ).values_list('question_id', 'answer_text'):
+        references.setdefault(question_id, []).append(text)
+    if question_ids is not None:
+        references = {question_id: texts for question_id, texts in references.items() if question_id in set(question_ids)}
+    
+    scored = 0
+    for question_id, texts in references.items():
+        pending = list(
+            StudentAnswer.objects.filter(
+                question_id=question_id, is_correct__isnull=True, attempt__completed_at__isnull=False
+            ).select_related('question').only('id', 'text_answer', 'question__points')
+        )
+        if not pending:
+            continue
+        
+        scores, confidences = score_answers(texts, [answer.text_answer for answer in pending])
+        for answer, score, confidence in zip(pending, scores.tolist(), confidences.tolist()):
+            answer.suggested_points = round(score * answer.question.points, 2)
+            answer.suggestion_confidence = round(confidence, 3)
+        
+        StudentAnswer.objects.bulk_update(
+            pending, ['suggested_points', 'suggestion_confidence'], batch_size=UPDATE_BATCH_SIZE
+        )
+        scored += len(pending)
+    
+    return scored
@@ -0,0 +1,275 @@
+# Save as: apps/assessments/grading.py
+
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.db.models.lookups import GreaterThanOrEqual
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import BooleanField
+from apps.analytics.ml_engine import learning_path_cache_key
+from .models import Answer, AssignmentSubmission, Question, Quiz, QuizAttempt, StudentAnswer
+
+PASS_POINTS = 50
+AUTO_GRADED_TYPES = ('mcq', 'true_false')
+
+
+class SubmissionError(Exception):
+    """A quiz submission that cannot be graded"""
+
+
+class GradingError(Exception):
+    """A batch of manual grades that cannot be applied"""
+
+
+def load_answer_key(quiz_id):
+    """Questions and answer options of a quiz as dicts, in two queries
+    
+    Returns ({question_id: (question_type, points)}, {answer_id: (question_id, is_correct)}).
+    """
+    questions = {
+        question_id: (question_type, points)
+        for question_id, question_type, points in Question.objects.filter(quiz_id=quiz_id).values_list(
+            'id', 'question_type', 'points'
+        )
+    }
+    answers = {
+        answer_id: (question_id, is_correct)
+        for answer_id, question_id, is_correct in Answer.objects.filter(question__quiz_id=quiz_id).values_list(
+            'id', 'question_id', 'is_correct'
+        )
+    }
+    return questions, answers
+
+
+def grade_answers(attempt, submitted, questions, answers):
+    """Grade submitted answers in memory
+    
+    Returns the unsaved StudentAnswer rows with earned and total points. A
+    question answered twice keeps its last answer; an option that belongs to
+    another question is graded as wrong.
+    """
+    latest = {}
+    for answer_data in submitted:
+        try:
+            latest[int(answer_data['question_id'])] = answer_data
+        except (KeyError, TypeError, ValueError):
+            raise SubmissionError('Every answer needs a question_id')
+    
+    unknown = sorted(set(latest) - set(questions))
+    if unknown:
+        raise SubmissionError(f'Questions not in this quiz: {unknown}')
+    
+    rows = []
+    total_points = 0
+    earned_points = 0
+    for question_id, answer_data in latest.items():
+        question_type, points = questions[question_id]
+        total_points += points
+        student_answer = StudentAnswer(attempt=attempt, question_id=question_id)
+        
+        if question_type in AUTO_GRADED_TYPES:
+            try:
+                answer_id = int(answer_data.get('answer_id'))
+            except (TypeError, ValueError):
+                raise SubmissionError(f'Question {question_id} needs an answer_id')
+            if answer_id not in answers:
+                raise SubmissionError(f'Unknown answer {answer_id}')
+            
+            answer_question_id, is_correct = answers[answer_id]
+            student_answer.selected_answer_id = answer_id
+            student_answer.is_correct = is_correct and answer_question_id == question_id
+            if student_answer.is_correct:
+                student_answer.points_earned = points
+                earned_points += points
+        else:
+            student_answer.text_answer = answer_data.get('text_answer', '')
+            # Manual grading required for text answers
+            student_answer.is_correct = None
+        
+        rows.append(student_answer)
+    
+    return rows, earned_points, total_points
+
+
+def submit_attempt(attempt_id, student, quiz_id, submitted):
+    """Grade and close a quiz attempt in one transaction
+    
+    The attempt row is locked so a double submit cannot grade it twice. The
+    answer key is read in two queries and the answers are written with one
+    bulk_create, whatever the number of questions.
+    """
+    with transaction.atomic():
+        attempt = get_object_or_404(
+            QuizAttempt.objects.select_for_update(of=('self',)).select_related('quiz'),
+            id=attempt_id,
+            student=student,
+            quiz_id=quiz_id
+        )
+        if attempt.completed_at:
+            raise SubmissionError('Quiz already submitted')
+        
+        questions, answers = load_answer_key(quiz_id)
+        rows, earned_points, total_points = grade_answers(attempt, submitted, questions, answers)
+        StudentAnswer.objects.bulk_create(rows)
+        
+        attempt.score = (earned_points / total_points) * 100 if total_points > 0 else 0
+        attempt.passed = attempt.score >= attempt.quiz.passing_score
+        attempt.completed_at = timezone.now()
+        attempt.save(update_fields=['score', 'passed', 'completed_at'])
+        
+        # Award points if passed
+        if attempt.passed:
+            get_user_model().objects.filter(pk=student.pk).update(points=F('points') + PASS_POINTS)
+    
+    return attempt
+
+
+def pending_answers(course_id):
+    """Submitted short answers in a course still waiting for a grade"""
+    return StudentAnswer.objects.filter(
+        is_correct__isnull=True,
+        question__quiz__course_id=course_id,
+        attempt__completed_at__isnull=False
+    ).select_related('question', 'attempt__student').order_by('attempt__completed_at', 'id')
+
+
+def pending_submissions(course_id):
+    """Assignment submissions in a course that have not been graded"""
+    return AssignmentSubmission.objects.filter(
+        grade__isnull=True,
+        assignment__course_id=course_id
+    ).select_related('assignment', 'student').order_by('submitted_at', 'id')
+
+
+def _by_id(items, kind):
+    try:
+        return {int(item['id']): item for item in items}
+    except (KeyError, TypeError, ValueError):
+        raise GradingError(f'Every {kind} grade needs an id')
+
+
+def grade_answers_bulk(grader, answer_grades):
+    """Apply manual points to short answers; returns the number graded and the attempts to rescore"""
+    grades = _by_id(answer_grades, 'answer')
+    rows = list(
+        StudentAnswer.objects.select_for_update(of=('self',)).filter(
+            id__in=grades, question__quiz__course__instructor=grader
+        ).select_related('question')
+    )
+    missing = sorted(set(grades) - {row.id for row in rows})
+    if missing:
+        raise GradingError(f'Answers not found: {missing}')
+    
+    for row in rows:
+        try:
+            points = float(grades[row.id]['points_earned'])
+        except (KeyError, TypeError, ValueError):
+            raise GradingError(f'Answer {row.id} needs points_earned')
+        if not 0 <= points <= row.question.points:
+            raise GradingError(f'Answer {row.id} can earn between 0 and {row.question.points} points')
+        
+        try:
+            is_correct = BooleanField().to_internal_value(grades[row.id].get('is_correct', points >= row.question.points))
+        except ValidationError:
+            raise GradingError(f'Answer {row.id} needs is_correct to be true or false')
+        
+        row.points_earned = points
+        row.is_correct = is_correct
+    
+    StudentAnswer.objects.bulk_update(rows, ['points_earned', 'is_correct'])
+    return len(rows), {row.attempt_id for row in rows}
+
+
+def grade_submissions_bulk(grader, submission_grades):
+    grades = _by_id(submission_grades, 'submission')
+    rows = list(
+        AssignmentSubmission.objects.select_for_update(of=('self',)).filter(
+            id__in=grades, assignment__course__instructor=grader
+        ).select_related('assignment')
+    )
+    missing = sorted(set(grades) - {row.id for row in rows})
+    if missing:
+        raise GradingError(f'Submissions not found: {missing}')
+    
+    now = timezone.now()
+    for row in rows:
+        try:
+            grade = float(grades[row.id]['grade'])
+        except (KeyError, TypeError, ValueError):
+            raise GradingError(f'Submission {row.id} needs a grade')
+        if not 0 <= grade <= row.assignment.max_points:
+            raise GradingError(f'Submission {row.id} can be graded between 0 and {row.assignment.max_points}')
+        
+        row.grade = grade
+        row.feedback = grades[row.id].get('feedback', row.feedback)
+        row.graded_by = grader
+        row.graded_at = now
+    
+    AssignmentSubmission.objects.bulk_update(rows, ['grade', 'feedback', 'graded_by', 'graded_at'])
+    return len(rows)
+
+
+def rescore_attempts(attempt_ids):
+    """Recompute score and passed for many attempts in one UPDATE
+    
+    Scores follow submit_attempt: points earned over the points of the
+    answered questions. Attempts that start passing earn the pass points,
+    attempts that stop passing give them back. update() skips post_save,
+    so the learning path caches are cleared here.
+    """
+    attempt_ids = list(attempt_ids)
+    if not attempt_ids:
+        return 0
+    
+    was_passed = dict(QuizAttempt.objects.filter(id__in=attempt_ids).values_list('id', 'passed'))
+    
+    answers = StudentAnswer.objects.filter(attempt=OuterRef('pk')).order_by().values('attempt')
+    earned = Subquery(answers.annotate(earned=Sum('points_earned')).values('earned'), output_field=FloatField())
+    possible = Subquery(answers.annotate(possible=Sum('question__points')).values('possible'))
+    passing_score = Subquery(Quiz.objects.filter(pk=OuterRef('quiz_id')).values('passing_score')[:1])
+    
+    score = Coalesce(
+        Coalesce(earned, 0.0) * 100.0 / NullIf(Cast(possible, FloatField()), 0.0),
+        0.0,
+        output_field=FloatField()
+    )
+    updated = QuizAttempt.objects.filter(id__in=attempt_ids).update(
+        score=score,
+        passed=GreaterThanOrEqual(score, passing_score)
+    )
+    
+    rescored = QuizAttempt.objects.filter(id__in=attempt_ids).values_list('id', 'passed', 'student_id', 'quiz__course_id')
+    point_changes = Counter()
+    cache_keys = set()
+    for attempt_id, passed, student_id, course_id in rescored:
+        if passed != was_passed.get(attempt_id, passed):
+            point_changes[student_id] += PASS_POINTS if passed else -PASS_POINTS
+        cache_keys.add(learning_path_cache_key(student_id, course_id))
+    
+    User = get_user_model()
+    for student_id, change in point_changes.items():
+        if change:
+            User.objects.filter(pk=student_id).update(points=F('points') + change)
+    
+    transaction.on_commit(lambda: cache.delete_many(list(cache_keys)))
+    return updated
+
+
+def apply_grades(grader, answer_grades=(), submission_grades=()):
+    """Apply a batch of manual grades in one transaction and rescore the touched attempts"""
+    with transaction.atomic():
+        answers, attempt_ids = grade_answers_bulk(grader, answer_grades) if answer_grades else (0, set())
+        submissions = grade_submissions_bulk(grader, submission_grades) if submission_grades else 0
+        rescore_attempts(attempt_ids)
+    
+    return {
+        'answers': answers,
+        'submissions': submissions,
+        'attempts_rescored': len(attempt_ids),
+    }
@@ -0,0 +1,47 @@
+# Save as: apps/assessments/management/commands/benchmark_autograder.py
+
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from apps.assessments.autograder import score_answers
+
+WORDS = ('recursion function calls itself base case stack frame returns value loop iteration '
+         'terminates condition memory overflow smaller problem input list tree node depth').split()
+
+
+def synthetic_answers(n_answers, seed=0):
+    """Reference answers plus student answers that are noisy copies or unrelated text"""
+    rng = np.random.default_rng(seed)
+    references = [
+        'a function that calls itself on a smaller input until it reaches a base case',
+        'recursion solves a problem by reducing it to a smaller instance of the same problem',
+    ]
+    answers = []
+    for i in range(n_answers):
+        if i % 2:
+            words = references[i % len(references)].split()
+            keep = rng.random(len(words)) > 0.3
+            answers.append(' '.join(word for word, kept in zip(words, keep) if kept))
+        else:
+            answers.append(' '.join(rng.choice(WORDS, size=rng.integers(5, 20))))
+    return references, answers
+
+
+class Command(BaseCommand):
+    help = 'Measure short-answer autograder throughput on synthetic answers'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'answers':>10}{'seconds':>10}{'answers/s':>12}{'mean score':>12}")
+        for size in options['sizes']:
+            references, answers = synthetic_answers(size)
+            
+            started = time.perf_counter()
+            scores, confidences = score_answers(references, answers)
+            elapsed = time.perf_counter() - started
+            
+            self.stdout.write(f'{size:>10}{elapsed:>10.2f}{size / elapsed:>12.0f}{scores.mean():>12.3f}')
@@ -0,0 +1,104 @@
+# Save as: apps/assessments/management/commands/benchmark_quiz_grading.py
+
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.assessments.attempts import start_attempt
+from apps.assessments.grading import submit_attempt
+from apps.assessments.models import Answer, Question, Quiz, StudentAnswer
+from apps.courses.models import Course
+
+OPTIONS_PER_QUESTION = 4
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measure queries and time to grade quiz submissions of several sizes; all data is rolled back'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[50, 200, 1000])
+        parser.add_argument('--legacy', action='store_true', help='Also time the old per-answer grading loop')
+    
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'questions':>10}{'pipeline':>10}{'queries':>9}{'ms':>10}")
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    quiz, student = self.create_quiz(size)
+                    self.run('batch', quiz, student, size, self.grade_batch)
+                    if options['legacy']:
+                        self.run('legacy', quiz, student, size, self.grade_legacy)
+                    raise Rollback
+            except Rollback:
+                pass
+    
+    def create_quiz(self, size):
+        User = get_user_model()
+        tag = uuid.uuid4().hex[:12]
+        instructor = User.objects.create(email=f'bench-i-{tag}@example.com', username=f'bench-i-{tag}', role='instructor')
+        student = User.objects.create(email=f'bench-s-{tag}@example.com', username=f'bench-s-{tag}')
+        course = Course.objects.create(title='Benchmark', slug=f'bench-{tag}', description='', instructor=instructor)
+        quiz = Quiz.objects.create(course=course, title=f'Benchmark {size}', max_attempts=1000)
+        
+        questions = Question.objects.bulk_create([
+            Question(quiz=quiz, question_text=f'Question {i}', points=1, order=i) for i in range(size)
+        ])
+        Answer.objects.bulk_create([
+            Answer(question=question, answer_text=f'Option {j}', is_correct=j == 0, order=j)
+            for question in questions
+            for j in range(OPTIONS_PER_QUESTION)
+        ])
+        return quiz, student
+    
+    def submission(self, quiz):
+        # Alternate right and wrong options so both branches are graded
+        options = {}
+        for answer_id, question_id in Answer.objects.filter(question__quiz=quiz).values_list('id', 'question_id'):
+            options.setdefault(question_id, []).append(answer_id)
+        return [
+            {'question_id': question_id, 'answer_id': answer_ids[i % 2]}
+            for i, (question_id, answer_ids) in enumerate(sorted(options.items()))
+        ]
+    
+    def run(self, label, quiz, student, size, grade):
+        # Each run needs its own attempt number under the unique (quiz, student, attempt_number) constraint
+        attempt = start_attempt(quiz, student)
+        submitted = self.submission(quiz)
+        
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            grade(attempt, student, quiz, submitted)
+            elapsed = time.perf_counter() - started
+        
+        self.stdout.write(f'{size:>10}{label:>10}{len(queries):>9}{elapsed * 1000:>10.1f}')
+    
+    def grade_batch(self, attempt, student, quiz, submitted):
+        submit_attempt(attempt.id, student, quiz.id, submitted)
+    
+    def grade_legacy(self, attempt, student, quiz, submitted):
+        # The per-answer loop QuizTakeView.post ran before the batch pipeline
+        total_points = 0
+        earned_points = 0
+        for answer_data in submitted:
+            question = Question.objects.get(id=answer_data['question_id'], quiz=attempt.quiz)
+            total_points += question.points
+            student_answer = StudentAnswer.objects.create(attempt=attempt, question=question)
+            selected_answer = Answer.objects.get(id=answer_data['answer_id'])
+            student_answer.selected_answer = selected_answer
+            student_answer.is_correct = selected_answer.is_correct
+            if selected_answer.is_correct:
+                student_answer.points_earned = question.points
+                earned_points += question.points
+            student_answer.save()
+        
+        attempt.score = (earned_points / total_points) * 100 if total_points else 0
+        attempt.passed = attempt.score >= attempt.quiz.passing_score
+        attempt.save()
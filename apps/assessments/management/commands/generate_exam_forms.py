@@ -0,0 +1,44 @@
+# Save as: apps/assessments/management/commands/generate_exam_forms.py
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.assessments.sampling import BlueprintError, generate_forms, parse_blueprint
+from apps.courses.models import Enrollment
+
+
+class Command(BaseCommand):
+    help = 'Generate randomized exam forms from a course question bank for every enrolled student'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int)
+        parser.add_argument('blueprint', help='e.g. "10 easy/#loops, 5 hard/#recursion, 3 medium"')
+        parser.add_argument('--seed', default='0', help='Exam seed; the same seed regenerates the same forms')
+        parser.add_argument('--output', help='Write {student_id: [question ids]} as JSON to this file')
+    
+    def handle(self, *args, **options):
+        try:
+            blueprint = parse_blueprint(options['blueprint'])
+        except BlueprintError as e:
+            raise CommandError(str(e))
+        
+        student_ids = list(
+            Enrollment.objects.filter(course_id=options['course_id']).values_list('student_id', flat=True)
+        )
+        
+        started = time.perf_counter()
+        try:
+            forms = generate_forms(options['course_id'], blueprint, student_ids, seed=options['seed'])
+        except BlueprintError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+        
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(forms, f)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(forms)} forms of {sum(count for count, *rest in blueprint)} questions in {elapsed:.2f}s'
+        ))
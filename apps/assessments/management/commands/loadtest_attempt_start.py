@@ -0,0 +1,98 @@
+# Save as: apps/assessments/management/commands/loadtest_attempt_start.py
+
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.assessments.attempts import MaxAttemptsReached, start_attempt
+from apps.assessments.models import Quiz, QuizAttempt
+from apps.courses.models import Course
+
+
+class Command(BaseCommand):
+    help = ('Fire concurrent quiz attempt starts against the configured database, report latency '
+            'percentiles and check that no student exceeds max_attempts. Test data is deleted afterwards.')
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--starts', type=int, default=500)
+        parser.add_argument('--students', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int, default=3)
+        parser.add_argument('--workers', type=int, default=50)
+    
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            raise CommandError('SQLite serializes writers; run this against PostgreSQL')
+        
+        course, quiz, students = self.create_fixtures(options['students'], options['max_attempts'])
+        try:
+            results = self.fire(quiz, students, options['starts'], options['workers'])
+            self.report(quiz, students, results, options['starts'])
+        finally:
+            course.delete()
+            get_user_model().objects.filter(pk__in=[student.pk for student in students] + [course.instructor_id]).delete()
+    
+    def create_fixtures(self, n_students, max_attempts):
+        User = get_user_model()
+        tag = uuid.uuid4().hex[:12]
+        instructor = User.objects.create(email=f'load-i-{tag}@example.com', username=f'load-i-{tag}', role='instructor')
+        course = Course.objects.create(title='Load test', slug=f'load-{tag}', description='', instructor=instructor)
+        quiz = Quiz.objects.create(course=course, title='Load test', max_attempts=max_attempts)
+        students = User.objects.bulk_create([
+            User(email=f'load-s-{tag}-{i}@example.com', username=f'load-s-{tag}-{i}') for i in range(n_students)
+        ])
+        return course, quiz, students
+    
+    def fire(self, quiz, students, starts, workers):
+        # Every worker starts at the same moment to reproduce an exam-open stampede
+        barrier = Barrier(min(workers, starts))
+        
+        def start(i):
+            student = students[i % len(students)]
+            try:
+                if i < barrier.parties:
+                    barrier.wait()
+                started = time.perf_counter()
+                try:
+                    start_attempt(quiz, student)
+                    outcome = 'created'
+                except MaxAttemptsReached:
+                    outcome = 'rejected'
+                return outcome, time.perf_counter() - started
+            finally:
+                connection.close()
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(start, range(starts)))
+    
+    def report(self, quiz, students, results, starts):
+        latencies = sorted(seconds * 1000 for outcome, seconds in results)
+        
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))]
+        
+        created = sum(1 for outcome, seconds in results if outcome == 'created')
+        starts_per_student = [starts // len(students) + (1 if i < starts % len(students) else 0) for i in range(len(students))]
+        expected = sum(min(n, quiz.max_attempts) for n in starts_per_student)
+        
+        # Per student the attempt numbers must be exactly 1..n with n <= max_attempts
+        numbers = {}
+        for student_id, attempt_number in QuizAttempt.objects.filter(quiz=quiz).values_list('student_id', 'attempt_number'):
+            numbers.setdefault(student_id, []).append(attempt_number)
+        broken = [
+            student_id for student_id, taken in numbers.items()
+            if sorted(taken) != list(range(1, len(taken) + 1)) or len(taken) > quiz.max_attempts
+        ]
+        
+        self.stdout.write(f'{starts} starts, {len(students)} students, max_attempts={quiz.max_attempts}')
+        self.stdout.write(f'p50 {percentile(50):.1f} ms  p95 {percentile(95):.1f} ms  '
+                          f'p99 {percentile(99):.1f} ms  max {latencies[-1]:.1f} ms')
+        self.stdout.write(f'created {created} (expected {expected}), rejected {len(results) - created}')
+        
+        if created != expected or broken:
+            raise CommandError(f'Attempt numbering is wrong for {len(broken)} students; created {created} of {expected}')
+        self.stdout.write(self.style.SUCCESS('No student exceeded max_attempts'))
@@ -1,4 +1,6 @@
 ```python
+import secrets
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from apps.courses.models import Course, Lesson
@@ -6,6 +8,11 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 
 User = get_user_model()
 
+
+def new_question_seed():
+    return secrets.randbits(31)
+
+
 class Quiz(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='quizzes')
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='quizzes', null=True, blank=True)
@@ -17,6 +24,8 @@ class Quiz(models.Model):
     show_answers = models.BooleanField(default=True)
     randomize_questions = models.BooleanField(default=False)
     is_proctored = models.BooleanField(default=False)
+    # Bumped whenever a question or answer changes; part of the cached payload key
+    content_version = models.IntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -73,10 +82,18 @@ class QuizAttempt(models.Model):
     score = models.FloatField(null=True, blank=True)
     passed = models.BooleanField(default=False)
     attempt_number = models.IntegerField(default=1)
+    # Seeds the question order when the quiz has randomize_questions set
+    question_seed = models.IntegerField(default=new_question_seed)
     
     class Meta:
         db_table = 'quiz_attempts'
         ordering = ['-started_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['quiz', 'student', 'attempt_number'],
+                name='unique_quiz_attempt_number'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.student.email} - {self.quiz.title} - Attempt {self.attempt_number}"
@@ -89,9 +106,20 @@ class StudentAnswer(models.Model):
     text_answer = models.TextField(blank=True)
     is_correct = models.BooleanField(null=True, blank=True)
     points_earned = models.FloatField(default=0)
+    # Written by the short-answer autograder for an instructor to accept or override
+    suggested_points = models.FloatField(null=True, blank=True)
+    suggestion_confidence = models.FloatField(null=True, blank=True)
     
     class Meta:
         db_table = 'student_answers'
+        indexes = [
+            # Pending manual grading; stays small because graded rows drop out
+            models.Index(
+                fields=['question'],
+                condition=models.Q(is_correct__isnull=True),
+                name='student_answer_pending_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.attempt.student.email} - {self.question.question_text[:50]}"
@@ -136,6 +164,13 @@ class AssignmentSubmission(models.Model):
         db_table = 'assignment_submissions'
         unique_together = ('assignment', 'student')
         ordering = ['-submitted_at']
+        indexes = [
+            models.Index(
+                fields=['assignment'],
+                condition=models.Q(grade__isnull=True),
+                name='submission_pending_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.student.email} - {self.assignment.title}"
@@ -0,0 +1,48 @@
+# Save as: apps/assessments/payload.py
+
+import random
+
+from django.core.cache import cache
+from django.db.models import F, Prefetch
+from .models import Question, Quiz
+from .serializers import QuizTakeSerializer
+
+QUIZ_PAYLOAD_KEY = 'quiz_take_payload:{}:{}:{}'
+QUIZ_PAYLOAD_CACHE_TIMEOUT = 60 * 60
+
+
+def bump_content_version(quiz_id):
+    Quiz.objects.filter(pk=quiz_id).update(content_version=F('content_version') + 1)
+
+
+def build_quiz_payload(quiz_id):
+    """Serialize a quiz for students with its questions and answers from one prefetched query set"""
+    quiz = Quiz.objects.prefetch_related(
+        Prefetch('questions', queryset=Question.objects.prefetch_related('answers'))
+    ).get(pk=quiz_id)
+    return QuizTakeSerializer(quiz).data
+
+
+def get_quiz_payload(quiz):
+    """Cached serialized quiz; edits to the quiz move updated_at, edits to its questions move content_version"""
+    key = QUIZ_PAYLOAD_KEY.format(quiz.pk, quiz.content_version, int(quiz.updated_at.timestamp() * 1000))
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_quiz_payload(quiz.pk)
+        cache.set(key, payload, QUIZ_PAYLOAD_CACHE_TIMEOUT)
+    return payload
+
+
+def payload_for_attempt(quiz, attempt):
+    """The quiz payload with the question order fixed by the attempt's seed
+    
+    Only the top-level dict and the question list are copied; the cached
+    question dicts are shared.
+    """
+    payload = get_quiz_payload(quiz)
+    if not quiz.randomize_questions:
+        return payload
+    
+    questions = list(payload['questions'])
+    random.Random(attempt.question_seed).shuffle(questions)
+    return {**payload, 'questions': questions}
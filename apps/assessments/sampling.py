@@ -0,0 +1,146 @@
+# Save as: apps/assessments/sampling.py
+
+import random
+import re
+
+from .models import QuestionBank
+
+BLUEPRINT_ITEM_RE = re.compile(r'^\s*(\d+)\s+(easy|medium|hard)(?:\s*/\s*#?([^,\s]+))?\s*$', re.IGNORECASE)
+
+
+class BlueprintError(ValueError):
+    """A blueprint the question bank cannot satisfy"""
+
+
+def normalize_tag(tag):
+    return tag.strip().lstrip('#').lower()
+
+
+def parse_blueprint(text):
+    """Parse "10 easy/#loops, 5 hard/#recursion, 3 medium" into (count, difficulty, tag) items"""
+    items = []
+    for part in text.split(','):
+        match = BLUEPRINT_ITEM_RE.match(part)
+        if not match:
+            raise BlueprintError(f'Cannot read blueprint item "{part.strip()}"')
+        count, difficulty, tag = match.groups()
+        items.append((int(count), difficulty.lower(), normalize_tag(tag) if tag else None))
+    return items
+
+
+class QuestionBankIndex:
+    """Question ids of a course's bank keyed by (difficulty, tag)
+    
+    Built from one query; (difficulty, None) holds every question of that
+    difficulty. Sampling never touches the database.
+    """
+    
+    def __init__(self, rows):
+        pools = {}
+        for question_id, difficulty, tags in rows:
+            pools.setdefault((difficulty, None), []).append(question_id)
+            for tag in {normalize_tag(tag) for tag in tags.split(',') if tag.strip()}:
+                pools.setdefault((difficulty, tag), []).append(question_id)
+        self.pools = {key: tuple(ids) for key, ids in pools.items()}
+    
+    @classmethod
+    def build(cls, course_id):
+        return cls(QuestionBank.objects.filter(course_id=course_id).values_list('id', 'difficulty', 'tags'))
+    
+    def ordered(self, blueprint):
+        """Blueprint items with the most specific pools first
+        
+        Tagged pools are subsets of their difficulty pool, so drawing them
+        before the untagged ones leaves the broad pools to fill the remainder.
+        """
+        return sorted(blueprint, key=lambda item: (item[2] is None, len(self.pools.get((item[1], item[2]), ()))))
+    
+    def validate(self, blueprint):
+        """Check the bank can fill every blueprint item with distinct questions
+        
+        Pools overlap (a question tagged #loops is also in the plain easy pool),
+        so per-pool sizes are not enough; this finds a full assignment of
+        questions to blueprint slots.
+        """
+        for count, difficulty, tag in blueprint:
+            available = len(self.pools.get((difficulty, tag), ()))
+            if available < count:
+                raise BlueprintError(f'Blueprint asks for {count} {_label(difficulty, tag)} questions '
+                                     f'but the bank has {available}')
+        
+        if self._match(self.ordered(blueprint), random.Random(0)) is None:
+            raise BlueprintError('The bank cannot fill every blueprint item with distinct questions')
+    
+    def sample(self, blueprint, rng):
+        """Draw one exam form; cost grows with the blueprint size, not the bank size
+        
+        A question carrying several tags can sit in more than one pool, so each
+        draw oversamples by the number already picked and skips repeats. When
+        overlapping tagged pools leave a later item short, the form is drawn by
+        the matching that validate() uses instead.
+        """
+        blueprint = self.ordered(blueprint)
+        picked = self._draw(blueprint, rng)
+        if picked is None:
+            picked = self._match(blueprint, rng)
+            if picked is None:
+                raise BlueprintError('The bank cannot fill every blueprint item with distinct questions')
+        
+        rng.shuffle(picked)
+        return picked
+    
+    def _draw(self, blueprint, rng):
+        picked = []
+        chosen = set()
+        for count, difficulty, tag in blueprint:
+            pool = self.pools.get((difficulty, tag), ())
+            candidates = rng.sample(pool, min(len(pool), count + len(chosen)))
+            fresh = [question_id for question_id in candidates if question_id not in chosen][:count]
+            if len(fresh) < count:
+                return None
+            picked.extend(fresh)
+            chosen.update(fresh)
+        return picked
+    
+    def _match(self, blueprint, rng):
+        """Random assignment of distinct questions to blueprint slots by augmenting paths, or None"""
+        slots = []
+        for count, difficulty, tag in blueprint:
+            pool = list(self.pools.get((difficulty, tag), ()))
+            rng.shuffle(pool)
+            slots.extend([pool] * count)
+        
+        owner = {}
+        
+        def assign(slot, visited):
+            for question_id in slots[slot]:
+                if question_id in visited:
+                    continue
+                visited.add(question_id)
+                if question_id not in owner or assign(owner[question_id], visited):
+                    owner[question_id] = slot
+                    return True
+            return False
+        
+        for slot in range(len(slots)):
+            if not assign(slot, set()):
+                return None
+        return list(owner)
+
+
+def _label(difficulty, tag):
+    return f'{difficulty}/#{tag}' if tag else difficulty
+
+
+def generate_forms(course_id, blueprint, student_ids, seed=0):
+    """Build per-student exam forms as {student_id: [question_bank ids]}
+    
+    Each form is seeded from the exam seed and the student id, so regenerating
+    with the same seed gives every student the same form.
+    """
+    index = QuestionBankIndex.build(course_id)
+    index.validate(blueprint)
+    return {
+        student_id: index.sample(blueprint, random.Random(f'{seed}:{student_id}'))
+        for student_id in student_ids
+    }
@@ -26,14 +26,31 @@ class QuizSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_question_count(self, obj):
+        # Reuse the questions prefetched for `questions`; otherwise a COUNT beats loading every row
+        if 'questions' in getattr(obj, '_prefetched_objects_cache', {}):
+            return len(obj.questions.all())
         return obj.questions.count()
 
 
+class QuizTakeQuestionSerializer(QuestionSerializer):
+    """Question as shown to a student; short-answer options are the reference answers and stay hidden"""
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if instance.question_type == 'short_answer':
+            data['answers'] = []
+        return data
+
+
+class QuizTakeSerializer(QuizSerializer):
+    questions = QuizTakeQuestionSerializer(many=True, read_only=True)
+
+
 class StudentAnswerSerializer(serializers.ModelSerializer):
     class Meta:
         model = StudentAnswer
         fields = '__all__'
-        read_only_fields = ['is_correct', 'points_earned']
+        read_only_fields = ['is_correct', 'points_earned', 'suggested_points', 'suggestion_confidence']
 
 
 class QuizAttemptSerializer(serializers.ModelSerializer):
@@ -0,0 +1,18 @@
+# Save as: apps/assessments/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Answer, Question
+from .payload import bump_content_version
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed(sender, instance, **kwargs):
+    bump_content_version(instance.quiz_id)
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def answer_changed(sender, instance, **kwargs):
+    bump_content_version(Question.objects.filter(pk=instance.question_id).values('quiz_id'))
@@ -0,0 +1,23 @@
+# Save as: apps/assessments/tasks.py
+
+from celery import shared_task
+from django.contrib.auth import get_user_model
+from .autograder import suggest_grades
+from .grading import GradingError, apply_grades
+
+
+@shared_task
+def apply_grades_task(grader_id, answer_grades, submission_grades):
+    """Apply a large batch of manual grades outside the request"""
+    grader = get_user_model().objects.get(pk=grader_id)
+    try:
+        return apply_grades(grader, answer_grades, submission_grades)
+    except GradingError as e:
+        # Nothing was written; the batch has to be corrected and resent
+        return {'error': str(e)}
+
+
+@shared_task
+def suggest_short_answer_grades(question_ids=None):
+    """Score ungraded short answers against their reference answers"""
+    return suggest_grades(question_ids)
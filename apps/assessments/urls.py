@@ -2,7 +2,7 @@ from django.urls import path
 from .views import (
     QuizListCreateView, QuizDetailView, QuizTakeView, MyQuizAttemptsView,
     AssignmentListCreateView, AssignmentDetailView, AssignmentSubmitView,
-    AssignmentGradeView, MyAssignmentsView
+    AssignmentGradeView, MyAssignmentsView, GradingQueueView, BulkGradeView
 )
 
 urlpatterns = [
@@ -18,4 +18,8 @@ urlpatterns = [
     path('assignments/<int:assignment_id>/submit/', AssignmentSubmitView.as_view(), name='assignment-submit'),
     path('submissions/<int:submission_id>/grade/', AssignmentGradeView.as_view(), name='assignment-grade'),
     path('my-assignments/', MyAssignmentsView.as_view(), name='my-assignments'),
+    
+    # Grading queue
+    path('courses/<int:course_id>/grading/pending/', GradingQueueView.as_view(), name='grading-pending'),
+    path('grading/bulk/', BulkGradeView.as_view(), name='grading-bulk'),
 ]
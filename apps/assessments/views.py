@@ -5,10 +5,15 @@ from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.db.models import Count, Avg
-from .models import Quiz, Question, Answer, QuizAttempt, StudentAnswer, Assignment, AssignmentSubmission
+from .models import Quiz, QuizAttempt, Assignment, AssignmentSubmission
 from .serializers import (QuizSerializer, QuestionSerializer, QuizAttemptSerializer,
                           StudentAnswerSerializer, AssignmentSerializer, AssignmentSubmissionSerializer)
 from apps.courses.models import Course, Enrollment
+from .attempts import MaxAttemptsReached, start_attempt
+from .grading import (GradingError, SubmissionError, apply_grades, pending_answers, pending_submissions,
+                      submit_attempt)
+from .tasks import apply_grades_task
+from .payload import payload_for_attempt
 from apps.authentication.permissions import IsInstructorUser
 
 class QuizListCreateView(generics.ListCreateAPIView):
@@ -17,7 +22,9 @@ class QuizListCreateView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         course_id = self.kwargs.get('course_id')
-        return Quiz.objects.filter(course_id=course_id, course__instructor=self.request.user)
+        return Quiz.objects.filter(course_id=course_id, course__instructor=self.request.user).prefetch_related(
+            'questions__answers'
+        )
     
     def perform_create(self, serializer):
         course = get_object_or_404(Course, id=self.kwargs['course_id'], instructor=self.request.user)
@@ -29,7 +36,7 @@ class QuizDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsInstructorUser]
     
     def get_queryset(self):
-        return Quiz.objects.filter(course__instructor=self.request.user)
+        return Quiz.objects.filter(course__instructor=self.request.user).prefetch_related('questions__answers')
 
 
 class QuizTakeView(APIView):
@@ -42,80 +49,95 @@ class QuizTakeView(APIView):
         if not Enrollment.objects.filter(student=request.user, course=quiz.course).exists():
             return Response({'error': 'You must be enrolled in this course'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Check attempts
-        attempts_count = QuizAttempt.objects.filter(quiz=quiz, student=request.user).count()
-        if attempts_count >= quiz.max_attempts:
+        # Reserve the next attempt number; concurrent starts cannot exceed max_attempts
+        try:
+            attempt = start_attempt(quiz, request.user)
+        except MaxAttemptsReached:
             return Response({'error': 'Maximum attempts reached'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create new attempt
-        attempt = QuizAttempt.objects.create(
-            quiz=quiz,
-            student=request.user,
-            attempt_number=attempts_count + 1
-        )
-        
-        serializer = QuizSerializer(quiz)
         return Response({
             'attempt_id': attempt.id,
-            'quiz': serializer.data
+            'quiz': payload_for_attempt(quiz, attempt)
         })
     
     def post(self, request, quiz_id):
         # Submit quiz answers
-        attempt_id = request.data.get('attempt_id')
-        answers = request.data.get('answers', [])
-        
-        attempt = get_object_or_404(QuizAttempt, id=attempt_id, student=request.user, quiz_id=quiz_id)
-        
-        if attempt.completed_at:
-            return Response({'error': 'Quiz already submitted'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        total_points = 0
-        earned_points = 0
-        
-        for answer_data in answers:
-            question = get_object_or_404(Question, id=answer_data['question_id'], quiz=attempt.quiz)
-            total_points += question.points
-            
-            student_answer = StudentAnswer.objects.create(
-                attempt=attempt,
-                question=question
+        try:
+            attempt = submit_attempt(
+                request.data.get('attempt_id'),
+                request.user,
+                quiz_id,
+                request.data.get('answers', [])
             )
-            
-            if question.question_type in ['mcq', 'true_false']:
-                selected_answer = get_object_or_404(Answer, id=answer_data['answer_id'])
-                student_answer.selected_answer = selected_answer
-                student_answer.is_correct = selected_answer.is_correct
-                if selected_answer.is_correct:
-                    student_answer.points_earned = question.points
-                    earned_points += question.points
-            else:
-                student_answer.text_answer = answer_data.get('text_answer', '')
-                # Manual grading required for text answers
-                student_answer.is_correct = None
-            
-            student_answer.save()
-        
-        # Calculate score
-        if total_points > 0:
-            score = (earned_points / total_points) * 100
-        else:
-            score = 0
-        
-        attempt.score = score
-        attempt.passed = score >= attempt.quiz.passing_score
-        attempt.completed_at = timezone.now()
-        attempt.save()
-        
-        # Award points if passed
-        if attempt.passed:
-            request.user.points += 50
-            request.user.save()
+        except SubmissionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         serializer = QuizAttemptSerializer(attempt)
         return Response(serializer.data)
 
 
+class GradingQueueView(APIView):
+    """Ungraded short answers and assignment submissions in an instructor's course"""
+    permission_classes = [IsInstructorUser]
+    max_items = 200
+    
+    def get(self, request, course_id):
+        course = get_object_or_404(Course, id=course_id, instructor=request.user)
+        try:
+            limit = min(int(request.query_params.get('limit', 50)), self.max_items)
+        except ValueError:
+            limit = 50
+        
+        answers = pending_answers(course.id)
+        submissions = pending_submissions(course.id)
+        
+        return Response({
+            'answers_count': answers.count(),
+            'submissions_count': submissions.count(),
+            'answers': [
+                {
+                    'id': answer.id,
+                    'attempt_id': answer.attempt_id,
+                    'student_email': answer.attempt.student.email,
+                    'question_id': answer.question_id,
+                    'question_text': answer.question.question_text,
+                    'max_points': answer.question.points,
+                    'text_answer': answer.text_answer,
+                    'suggested_points': answer.suggested_points,
+                    'suggestion_confidence': answer.suggestion_confidence,
+                }
+                for answer in answers[:limit]
+            ],
+            'submissions': AssignmentSubmissionSerializer(submissions[:limit], many=True).data,
+        })
+
+
+class BulkGradeView(APIView):
+    """Grade many short answers and submissions in one request
+    
+    Batches above async_threshold items are handed to Celery and answered
+    with 202 and the task id.
+    """
+    permission_classes = [IsInstructorUser]
+    async_threshold = 500
+    
+    def post(self, request):
+        answer_grades = request.data.get('answers', [])
+        submission_grades = request.data.get('submissions', [])
+        if not isinstance(answer_grades, list) or not isinstance(submission_grades, list):
+            return Response({'error': 'answers and submissions must be lists'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(answer_grades) + len(submission_grades) > self.async_threshold:
+            task = apply_grades_task.delay(request.user.id, answer_grades, submission_grades)
+            return Response({'task_id': task.id}, status=status.HTTP_202_ACCEPTED)
+        
+        try:
+            result = apply_grades(request.user, answer_grades, submission_grades)
+        except GradingError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+
 class MyQuizAttemptsView(generics.ListAPIView):
     serializer_class = QuizAttemptSerializer
     permission_classes = [permissions.IsAuthenticated]
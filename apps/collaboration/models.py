@@ -33,6 +33,9 @@ class ForumThread(models.Model):
     class Meta:
         db_table = 'forum_threads'
         ordering = ['-is_pinned', '-updated_at']
+        indexes = [
+            models.Index(fields=['forum', '-is_pinned', '-updated_at', '-id']),
+        ]
     
     def __str__(self):
         return self.title
@@ -74,6 +77,9 @@ class ChatMessage(models.Model):
     class Meta:
         db_table = 'chat_messages'
         ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['room', '-timestamp', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.sender.email}: {self.message[:50]}"
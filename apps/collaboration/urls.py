@@ -3,7 +3,7 @@
 from django.urls import path
 from .views import (
     ForumListCreateView, ForumThreadListCreateView, ForumThreadDetailView,
-    ForumPostCreateView, ChatRoomView, PeerReviewCreateView, LiveSessionListCreateView
+    ForumPostCreateView, ChatRoomView, ChatHistoryView, PeerReviewCreateView, LiveSessionListCreateView
 )
 
 urlpatterns = [
@@ -15,6 +15,7 @@ urlpatterns = [
     
     # Chat
     path('courses/<int:course_id>/chat/', ChatRoomView.as_view(), name='chat-room'),
+    path('courses/<int:course_id>/chat/history/', ChatHistoryView.as_view(), name='chat-history'),
     
     # Peer Review
     path('peer-reviews/', PeerReviewCreateView.as_view(), name='peer-review-create'),
@@ -1,6 +1,7 @@
 ### **apps/collaboration/views.py**
 ```python
 from rest_framework import generics, permissions
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
@@ -8,6 +9,7 @@ from .models import Forum, ForumThread, ForumPost, ChatRoom, ChatMessage, PeerRe
 from .serializers import (ForumSerializer, ForumThreadSerializer, ForumPostSerializer,
                           ChatMessageSerializer, PeerReviewSerializer, LiveSessionSerializer)
 from apps.courses.models import Course, Enrollment
+from apps.courses.pagination import PinnedThreadPagination, TimestampCursorPagination
 
 class ForumListCreateView(generics.ListCreateAPIView):
     serializer_class = ForumSerializer
@@ -25,6 +27,7 @@ class ForumListCreateView(generics.ListCreateAPIView):
 class ForumThreadListCreateView(generics.ListCreateAPIView):
     serializer_class = ForumThreadSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PinnedThreadPagination
     
     def get_queryset(self):
         forum_id = self.kwargs.get('forum_id')
@@ -69,15 +72,32 @@ class ChatRoomView(APIView):
                 return Response({'error': 'Not enrolled'}, status=403)
         
         chat_room, created = ChatRoom.objects.get_or_create(course=course)
-        messages = ChatMessage.objects.filter(room=chat_room).select_related('sender')[:50]
+        # Latest 50 in chronological order; older ones come from ChatHistoryView
+        messages = ChatMessage.objects.filter(room=chat_room).select_related('sender').order_by('-timestamp')[:50]
         
-        serializer = ChatMessageSerializer(messages, many=True)
+        serializer = ChatMessageSerializer(reversed(messages), many=True)
         return Response({
             'room_id': chat_room.id,
             'messages': serializer.data
         })
 
 
+class ChatHistoryView(generics.ListAPIView):
+    serializer_class = ChatMessageSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimestampCursorPagination
+    
+    def get_queryset(self):
+        course = get_object_or_404(Course, id=self.kwargs['course_id'])
+        
+        # Check enrollment
+        if not Enrollment.objects.filter(student=self.request.user, course=course).exists():
+            if course.instructor != self.request.user:
+                raise PermissionDenied('Not enrolled')
+        
+        return ChatMessage.objects.filter(room__course=course).select_related('sender')
+
+
 class PeerReviewCreateView(generics.CreateAPIView):
     serializer_class = PeerReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
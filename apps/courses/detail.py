@@ -0,0 +1,74 @@
+# Save as: apps/courses/detail.py
+
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db.models import Count, Prefetch, Q
+from rest_framework.renderers import JSONRenderer
+from .models import Category, Course, Module, Review
+from .progress import bump_version, get_version
+
+COURSE_DETAIL_KEY = 'course_detail:{}:{}:{}'
+DETAIL_VERSION_KEY = 'course_detail_version:{}'
+# Enrollment counts in the payload are allowed to lag by this much
+COURSE_DETAIL_CACHE_TIMEOUT = 60 * 10
+
+
+class SiteRequest:
+    """Stand-in request for payloads shared by every visitor
+    
+    File and image fields only call build_absolute_uri, so the shared course
+    detail gets absolute media URLs from settings.SITE_URL instead of the
+    relative paths DRF falls back to without a request.
+    """
+    user = AnonymousUser()
+    
+    def build_absolute_uri(self, location=None):
+        return urljoin(settings.SITE_URL, location or '/')
+
+
+def bump_detail_version(course_id):
+    bump_version(DETAIL_VERSION_KEY.format(course_id))
+
+
+def course_detail_queryset():
+    """Published courses with everything CourseDetailSerializer reads loaded up front"""
+    return Course.objects.filter(status='published').select_related('instructor').with_stats().prefetch_related(
+        Prefetch(
+            'category',
+            queryset=Category.objects.annotate(
+                published_course_count=Count('courses', filter=Q(courses__status='published'))
+            )
+        ),
+        Prefetch('modules', queryset=Module.objects.prefetch_related('lessons')),
+        Prefetch('reviews', queryset=Review.objects.select_related('student')),
+    )
+
+
+def course_detail_cache_key(course_id, slug, updated_at):
+    # Module, lesson and review changes bump the version; edits to the course itself move updated_at
+    version = get_version(DETAIL_VERSION_KEY.format(course_id))
+    return COURSE_DETAIL_KEY.format(slug, int(updated_at.timestamp() * 1000), version)
+
+
+def render_course_detail(course_id, slug, updated_at, serialize):
+    """Pre-rendered JSON for the parts of a course page that are the same for everyone
+    
+    `serialize` is called with the prefetched course on a cache miss and must
+    return the serializer data without `is_enrolled`.
+    """
+    key = course_detail_cache_key(course_id, slug, updated_at)
+    payload = cache.get(key)
+    if payload is None:
+        course = course_detail_queryset().get(pk=course_id)
+        payload = JSONRenderer().render(serialize(course))
+        cache.set(key, payload, COURSE_DETAIL_CACHE_TIMEOUT)
+    return payload
+
+
+def with_enrollment(payload, is_enrolled):
+    """Splice the per-request is_enrolled flag into a pre-rendered course object"""
+    flag = b'true' if is_enrolled else b'false'
+    return payload[:-1] + b',"is_enrolled":' + flag + b'}'
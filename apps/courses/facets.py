@@ -0,0 +1,95 @@
+# Save as: apps/courses/facets.py
+
+import hashlib
+import json
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Count
+from .models import Course
+from .progress import bump_version, get_version
+from .search import search_courses
+
+FACETS_KEY = 'course_facets:{}:{}'
+FACETS_VERSION_KEY = 'course_facets_version'
+FACETS_CACHE_TIMEOUT = 60 * 5
+# Facet name -> field in the grouped values() row
+FACET_FIELDS = {
+    'category': 'category__name',
+    'difficulty': 'difficulty',
+    'language': 'language',
+    'is_free': 'is_free',
+}
+
+
+def bump_facets_version():
+    bump_version(FACETS_VERSION_KEY)
+
+
+def normalize_filters(params):
+    """Catalogue filters from query params in a canonical form, usable as a cache key"""
+    filters = {}
+    for name in ('category', 'difficulty', 'language'):
+        value = params.get(name, '').strip()
+        if value:
+            filters[name] = value.lower() if name == 'language' else value
+    
+    is_free = params.get('is_free')
+    if is_free is not None:
+        filters['is_free'] = is_free.lower() == 'true'
+    
+    # Split like SearchFilter.get_search_terms so the facets count the rows the list returns
+    search = ' '.join(params.get('search', '').replace('\x00', '').replace(',', ' ').split())
+    if search:
+        filters['search'] = search
+    return filters
+
+
+def filter_courses(queryset, filters):
+    if 'category' in filters:
+        queryset = queryset.filter(category__name=filters['category'])
+    if 'difficulty' in filters:
+        queryset = queryset.filter(difficulty=filters['difficulty'])
+    if 'language' in filters:
+        queryset = queryset.filter(language__iexact=filters['language'])
+    if 'is_free' in filters:
+        queryset = queryset.filter(is_free=filters['is_free'])
+    if 'search' in filters:
+        queryset = search_courses(queryset, filters['search'].split())
+    return queryset
+
+
+def compute_facets(filters):
+    """Counts per category, difficulty, language and price for the filtered and searched catalogue
+    
+    One GROUP BY over all facet columns; each facet is rolled up from those
+    groups in Python.
+    """
+    groups = filter_courses(Course.objects.filter(status='published'), filters).order_by().values(
+        *FACET_FIELDS.values()
+    ).annotate(count=Count('id'))
+    
+    counts = {name: Counter() for name in FACET_FIELDS}
+    total = 0
+    for group in groups:
+        total += group['count']
+        for name, field in FACET_FIELDS.items():
+            counts[name][group[field]] += group['count']
+    
+    return {
+        'total': total,
+        'facets': {
+            name: [{'value': value, 'count': count} for value, count in counter.most_common()]
+            for name, counter in counts.items()
+        },
+    }
+
+
+def get_facets(filters):
+    digest = hashlib.md5(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+    key = FACETS_KEY.format(get_version(FACETS_VERSION_KEY), digest)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(filters)
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
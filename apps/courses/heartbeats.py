@@ -0,0 +1,170 @@
+# Save as: apps/courses/heartbeats.py
+
+import json
+import logging
+import time
+from datetime import datetime, timezone
+
+from django.db import DatabaseError, transaction
+from django_redis import get_redis_connection
+from redis.exceptions import ResponseError
+from .models import Enrollment, Lesson, LessonProgress
+
+logger = logging.getLogger(__name__)
+
+# Field "<enrollment_id>:<lesson_id>" -> JSON {position, time_spent, at}
+HEARTBEATS_KEY = 'lesson_heartbeats'
+# A flush renames the live hash here first, so new heartbeats keep landing in a fresh one
+FLUSHING_KEY = 'lesson_heartbeats:flushing'
+
+
+def _field(enrollment_id, lesson_id):
+    return f'{enrollment_id}:{lesson_id}'
+
+
+def buffer_heartbeat(enrollment_id, lesson_id, last_position_seconds, time_spent_seconds):
+    """Record a position heartbeat in Redis; flush_heartbeats writes it to the database later"""
+    get_redis_connection('default').hset(HEARTBEATS_KEY, _field(enrollment_id, lesson_id), json.dumps({
+        'last_position_seconds': last_position_seconds,
+        'time_spent_seconds': time_spent_seconds,
+        'at': time.time(),
+    }))
+
+
+def pending_heartbeats(enrollment_id, lesson_ids):
+    """Return {lesson_id: heartbeat} for heartbeats of an enrollment not flushed yet"""
+    lesson_ids = list(lesson_ids)
+    if not lesson_ids:
+        return {}
+    
+    fields = [_field(enrollment_id, lesson_id) for lesson_id in lesson_ids]
+    conn = get_redis_connection('default')
+    pipe = conn.pipeline()
+    pipe.hmget(FLUSHING_KEY, fields)
+    pipe.hmget(HEARTBEATS_KEY, fields)
+    flushing, live = pipe.execute()
+    
+    pending = {}
+    for lesson_id, older, newer in zip(lesson_ids, flushing, live):
+        value = newer or older
+        if value:
+            pending[lesson_id] = json.loads(value)
+    return pending
+
+
+def discard_heartbeat(enrollment_id, lesson_id):
+    """Drop a buffered heartbeat that a synchronous write has superseded"""
+    conn = get_redis_connection('default')
+    pipe = conn.pipeline()
+    pipe.hdel(HEARTBEATS_KEY, _field(enrollment_id, lesson_id))
+    pipe.hdel(FLUSHING_KEY, _field(enrollment_id, lesson_id))
+    pipe.execute()
+
+
+def _parse(field, value):
+    """(key, heartbeat) for a buffered entry, or None when it is malformed"""
+    try:
+        enrollment_id, lesson_id = (int(part) for part in field.decode().split(':'))
+        heartbeat = json.loads(value)
+        parsed = {
+            'last_position_seconds': int(heartbeat['last_position_seconds']),
+            'time_spent_seconds': int(heartbeat['time_spent_seconds']),
+            'at': float(heartbeat['at']),
+        }
+    except (ValueError, TypeError, KeyError):
+        return None
+    if parsed['last_position_seconds'] < 0 or parsed['time_spent_seconds'] < 0:
+        return None
+    return (enrollment_id, lesson_id), parsed
+
+
+def _flush_batch(batch, heartbeats):
+    enrollment_ids = {enrollment_id for enrollment_id, lesson_id in batch}
+    lesson_ids = {lesson_id for enrollment_id, lesson_id in batch}
+    
+    existing = {
+        (progress.enrollment_id, progress.lesson_id): progress
+        for progress in LessonProgress.objects.filter(
+            enrollment_id__in=enrollment_ids, lesson_id__in=lesson_ids
+        ).only('id', 'enrollment_id', 'lesson_id', 'last_position_seconds', 'time_spent_seconds', 'client_updated_at')
+    }
+    # Enrollments or lessons deleted since the heartbeat was buffered are dropped
+    enrollment_courses = dict(Enrollment.objects.filter(id__in=enrollment_ids).values_list('id', 'course_id'))
+    lesson_courses = dict(Lesson.objects.filter(id__in=lesson_ids).values_list('id', 'module__course_id'))
+    
+    updated, created = [], []
+    for key in batch:
+        heartbeat = heartbeats[key]
+        recorded_at = datetime.fromtimestamp(heartbeat['at'], tz=timezone.utc)
+        progress = existing.get(key)
+        if progress is None:
+            enrollment_id, lesson_id = key
+            course_id = enrollment_courses.get(enrollment_id)
+            if course_id is None or lesson_courses.get(lesson_id) != course_id:
+                continue
+            created.append(LessonProgress(
+                enrollment_id=enrollment_id,
+                lesson_id=lesson_id,
+                last_position_seconds=heartbeat['last_position_seconds'],
+                time_spent_seconds=heartbeat['time_spent_seconds'],
+                client_updated_at=recorded_at,
+            ))
+        elif progress.client_updated_at is None or progress.client_updated_at < recorded_at:
+            progress.last_position_seconds = heartbeat['last_position_seconds']
+            progress.time_spent_seconds = heartbeat['time_spent_seconds']
+            progress.client_updated_at = recorded_at
+            updated.append(progress)
+    
+    with transaction.atomic():
+        LessonProgress.objects.bulk_update(updated, ['last_position_seconds', 'time_spent_seconds', 'client_updated_at'])
+        # A row created by a synchronous write in the meantime is newer than the heartbeat
+        LessonProgress.objects.bulk_create(created, ignore_conflicts=True)
+    return len(updated) + len(created)
+
+
+def flush_heartbeats(batch_size=1000):
+    """Write buffered heartbeats to lesson_progress with bulk_update/bulk_create
+    
+    Each batch is removed from the flushing hash once it commits, together
+    with malformed and orphaned entries. A batch that fails with a database
+    error is logged and left in the hash, which the next flush finishes before
+    taking the live one. Returns the number of rows written.
+    """
+    conn = get_redis_connection('default')
+    
+    # A previous flush that died or failed half way left its hash behind; finish that one first
+    if not conn.exists(FLUSHING_KEY):
+        try:
+            conn.rename(HEARTBEATS_KEY, FLUSHING_KEY)
+        except ResponseError:
+            # Nothing buffered
+            return 0
+    
+    heartbeats = {}
+    fields = {}
+    malformed = []
+    for field, value in conn.hgetall(FLUSHING_KEY).items():
+        parsed = _parse(field, value)
+        if parsed is None:
+            malformed.append(field)
+            continue
+        key, heartbeat = parsed
+        heartbeats[key] = heartbeat
+        fields.setdefault(key, []).append(field)
+    
+    if malformed:
+        conn.hdel(FLUSHING_KEY, *malformed)
+    
+    written = 0
+    keys = list(heartbeats)
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        try:
+            written += _flush_batch(batch, heartbeats)
+        except DatabaseError:
+            logger.exception('Kept a batch of %d lesson heartbeats for the next flush', len(batch))
+            continue
+        # Redis drops the hash with its last field
+        conn.hdel(FLUSHING_KEY, *[field for key in batch for field in fields[key]])
+    
+    return written
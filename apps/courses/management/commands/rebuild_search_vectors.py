@@ -0,0 +1,27 @@
+# Save as: apps/courses/management/commands/rebuild_search_vectors.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.courses.models import Course
+from apps.courses.search import search_enabled, update_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Recompute Course.search_vector for every course'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        if not search_enabled():
+            raise CommandError('Full-text search needs PostgreSQL')
+        
+        batch_size = options['batch_size']
+        ids = list(Course.objects.order_by('pk').values_list('pk', flat=True))
+        
+        # Batches keep each UPDATE's row locks short
+        updated = 0
+        for start in range(0, len(ids), batch_size):
+            updated += update_search_vectors(Course.objects.filter(pk__in=ids[start:start + batch_size]))
+        
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search vectors for {updated} courses'))
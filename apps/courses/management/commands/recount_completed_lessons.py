@@ -0,0 +1,40 @@
+# Save as: apps/courses/management/commands/recount_completed_lessons.py
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+
+from apps.courses.models import Enrollment, Lesson
+
+
+class Command(BaseCommand):
+    help = 'Rebuild Enrollment.completed_lessons and progress_percentage from LessonProgress'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        lesson_counts = dict(
+            Lesson.objects.order_by().values('module__course_id').annotate(
+                count=Count('id')
+            ).values_list('module__course_id', 'count')
+        )
+        
+        enrollments = Enrollment.objects.annotate(
+            done=Count('lesson_progress', filter=Q(lesson_progress__completed=True))
+        ).only('id', 'course_id', 'completed_lessons', 'progress_percentage')
+        
+        changed = []
+        for enrollment in enrollments.iterator(chunk_size=options['batch_size']):
+            total = lesson_counts.get(enrollment.course_id, 0)
+            enrollment.completed_lessons = enrollment.done
+            enrollment.progress_percentage = min(enrollment.done / total * 100, 100.0) if total else 0.0
+            changed.append(enrollment)
+            
+            if len(changed) >= options['batch_size']:
+                Enrollment.objects.bulk_update(changed, ['completed_lessons', 'progress_percentage'])
+                changed = []
+        
+        if changed:
+            Enrollment.objects.bulk_update(changed, ['completed_lessons', 'progress_percentage'])
+        
+        self.stdout.write(self.style.SUCCESS('Recounted completed lessons'))
@@ -1,7 +1,10 @@
 ```python
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.functions import Coalesce
 
 User = get_user_model()
 
@@ -20,6 +23,31 @@ class Category(models.Model):
         return self.name
 
 
+class SearchVectorIndex(GinIndex):
+    """GIN index on PostgreSQL; a plain index elsewhere so the schema still builds on SQLite"""
+    
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return models.Index.create_sql(self, model, schema_editor, using=using, **kwargs)
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+
+class CourseQuerySet(models.QuerySet):
+    def with_stats(self):
+        """Annotate enrollment_count and rating_avg with correlated subqueries"""
+        enrollments = Enrollment.objects.filter(course=models.OuterRef('pk')).order_by().values('course').annotate(
+            count=models.Count('pk')
+        ).values('count')
+        ratings = Review.objects.filter(course=models.OuterRef('pk')).order_by().values('course').annotate(
+            avg=models.Avg('rating')
+        ).values('avg')
+        
+        return self.annotate(
+            enrollment_count=Coalesce(models.Subquery(enrollments, output_field=models.IntegerField()), 0),
+            rating_avg=Coalesce(models.Subquery(ratings, output_field=models.FloatField()), 0.0),
+        )
+
+
 class Course(models.Model):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
@@ -51,20 +79,33 @@ class Course(models.Model):
     drip_days_interval = models.IntegerField(default=7)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by apps.courses.search; see rebuild_search_vectors
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    objects = CourseQuerySet.as_manager()
     
     class Meta:
         db_table = 'courses'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at', '-id']),
+            SearchVectorIndex(fields=['search_vector'], name='course_search_vector_idx'),
+        ]
     
     def __str__(self):
         return self.title
     
     @property
     def total_enrollments(self):
+        # Prefer the value annotated by CourseQuerySet.with_stats()
+        if hasattr(self, 'enrollment_count'):
+            return self.enrollment_count
         return self.enrollments.count()
     
     @property
     def average_rating(self):
+        if hasattr(self, 'rating_avg'):
+            return self.rating_avg
         ratings = self.reviews.aggregate(models.Avg('rating'))
         return ratings['rating__avg'] or 0
 
@@ -124,12 +165,16 @@ class Enrollment(models.Model):
     completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(null=True, blank=True)
     progress_percentage = models.FloatField(default=0.0)
+    completed_lessons = models.IntegerField(default=0)
     last_accessed = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'enrollments'
         unique_together = ('student', 'course')
         ordering = ['-enrolled_at']
+        indexes = [
+            models.Index(fields=['last_accessed']),
+        ]
     
     def __str__(self):
         return f"{self.student.email} - {self.course.title}"
@@ -142,6 +187,8 @@ class LessonProgress(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     time_spent_seconds = models.IntegerField(default=0)
     last_position_seconds = models.IntegerField(default=0)
+    # When the client recorded the values above; later writes win when syncing
+    client_updated_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         db_table = 'lesson_progress'
@@ -163,6 +210,9 @@ class Review(models.Model):
         db_table = 'reviews'
         unique_together = ('course', 'student')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['course', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.student.email} - {self.course.title} - {self.rating}★"
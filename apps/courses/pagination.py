@@ -0,0 +1,258 @@
+# Save as: apps/courses/pagination.py
+
+import base64
+import binascii
+import datetime
+import json
+from collections import OrderedDict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder without its millisecond rounding of datetimes
+    
+    Keyset comparisons must see the exact stored value, so datetimes keep
+    their microseconds and are tagged for decode_cursor to parse back.
+    """
+    
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return {'dt': o.isoformat()}
+        return super().default(o)
+
+
+def decode_value(value):
+    if isinstance(value, dict):
+        parsed = parse_datetime(value.get('dt') or '')
+        if parsed is None:
+            raise ValueError('Invalid datetime in cursor')
+        return parsed
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """Keyset (cursor) pagination over a composite sort key
+    
+    The cursor holds the values of every ordering field of the last row seen,
+    and the next page is the rows strictly after that tuple. The ordering must
+    end in a unique column and its fields must not be null, so ties in the
+    leading columns never fall back to offsets. With an index on the ordering
+    columns every page is a range scan and no COUNT(*) is issued.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    ordering = ('-created_at', '-id')
+    
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        
+        ordering = [self.flip(field) for field in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+        
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+        
+        # Paging backwards means the page we came from is still ahead, and vice versa
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        self.first_position = self.position(rows[0]) if rows else None
+        self.last_position = self.position(rows[-1]) if rows else None
+        return rows
+    
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+    
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return self.encode_cursor(self.last_position, reverse=False)
+    
+    def get_previous_link(self):
+        if not self.has_previous or self.first_position is None:
+            return None
+        return self.encode_cursor(self.first_position, reverse=True)
+    
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+    
+    @staticmethod
+    def after(ordering, position):
+        """Rows that sort strictly after `position` under `ordering`, as an expanded row comparison"""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+    
+    def position(self, row):
+        return [getattr(row, field.lstrip('-')) for field in self.ordering]
+    
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': reverse}, cls=CursorEncoder)
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+    
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            position, reverse = payload['p'], bool(payload['r'])
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            position = [decode_value(value) for value in position]
+        except (ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+
+class NewestFirstCursorPagination(KeysetPagination):
+    """Keyset pagination on (created_at, id), newest first"""
+    ordering = ('-created_at', '-id')
+
+
+class TimestampCursorPagination(KeysetPagination):
+    """Keyset pagination for chat history, newest messages first"""
+    ordering = ('-timestamp', '-id')
+
+
+class PinnedThreadPagination(KeysetPagination):
+    """Forum threads with pinned ones first, then by latest activity"""
+    ordering = ('-is_pinned', '-updated_at', '-id')
+
+
+class OptionalCountPageNumberPagination(PageNumberPagination):
+    """Page number pagination that skips COUNT(*) when called with ?count=false
+    
+    Without the count, one extra row is fetched to tell whether a next page
+    exists and the response carries no `count`.
+    """
+    count_query_param = 'count'
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.skip_count = request.query_params.get(self.count_query_param, '').lower() in ('false', '0')
+        if not self.skip_count:
+            return super().paginate_queryset(queryset, request, view)
+        
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        
+        page_number = request.query_params.get(self.page_query_param, 1)
+        try:
+            self.page_number = int(page_number)
+            if self.page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message='Invalid page.'))
+        
+        self.request = request
+        self.display_page_controls = False
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+    
+    def get_paginated_response(self, data):
+        if not self.skip_count:
+            return super().get_paginated_response(data)
+        
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+    
+    def get_next_link(self):
+        if not self.skip_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.page_number + 1)
+    
+    def get_previous_link(self):
+        if not self.skip_count:
+            return super().get_previous_link()
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+
+class CoursePagination(BasePagination):
+    """Keyset pages for the course list's creation-date orderings, page numbers for the rest
+    
+    Price, rating and enrollment orderings have large tie groups and sort on
+    unindexed annotations, and full-text results sort on ts_rank; a keyset
+    over those would not be a range scan, so they use
+    OptionalCountPageNumberPagination with the id as tie-breaker.
+    """
+    keyset_orderings = {
+        None: ('-created_at', '-id'),
+        '-created_at': ('-created_at', '-id'),
+        'created_at': ('created_at', 'id'),
+    }
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = request.query_params.get('ordering') or None
+        searching = 'search_rank' in queryset.query.annotations
+        
+        if ordering in self.keyset_orderings and not searching:
+            self.delegate = KeysetPagination()
+            self.delegate.ordering = self.keyset_orderings[ordering]
+        else:
+            self.delegate = OptionalCountPageNumberPagination()
+            if searching and ordering is None:
+                queryset = queryset.order_by('-search_rank', '-created_at', '-id')
+            else:
+                order_by = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+                queryset = queryset.order_by(*order_by, '-id')
+        return self.delegate.paginate_queryset(queryset, request, view)
+    
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+    
+    def to_html(self):
+        return self.delegate.to_html()
+    
+    @property
+    def display_page_controls(self):
+        return getattr(getattr(self, 'delegate', None), 'display_page_controls', False)
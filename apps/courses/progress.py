@@ -0,0 +1,234 @@
+# Save as: apps/courses/progress.py
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, Greatest, Least
+from django.utils import timezone
+from django.utils.http import quote_etag
+from apps.analytics.counters import record_completion
+from .models import Enrollment, Lesson, LessonProgress
+
+PROGRESS_VERSION_KEY = 'course_progress_version:{}'
+STRUCTURE_VERSION_KEY = 'course_structure_version:{}'
+LESSON_COUNT_KEY = 'course_lesson_count:{}'
+ENROLLMENT_TOUCHED_KEY = 'enrollment_touched:{}'
+ENROLLMENT_TOUCH_INTERVAL = 60 * 60
+COMPLETION_POINTS = 100
+SYNC_FIELDS = ('last_position_seconds', 'time_spent_seconds', 'completed')
+
+
+def _fresh_version():
+    # Start from the clock so a counter lost on cache eviction never repeats an old value
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), timeout=None)
+
+
+def bump_progress_version(enrollment_id):
+    bump_version(PROGRESS_VERSION_KEY.format(enrollment_id))
+
+
+def bump_structure_version(course_id):
+    bump_version(STRUCTURE_VERSION_KEY.format(course_id))
+
+
+def progress_etag(enrollment):
+    """ETag for a learner's progress tree in a course
+    
+    Changes when the learner records progress or when the course's modules or
+    lessons change. The course's public stats embedded in the payload are not
+    part of it.
+    """
+    progress_version = get_version(PROGRESS_VERSION_KEY.format(enrollment.pk))
+    structure_version = get_version(STRUCTURE_VERSION_KEY.format(enrollment.course_id))
+    return quote_etag(f'{enrollment.pk}-{progress_version}-{structure_version}-{enrollment.progress_percentage}')
+
+
+def get_lesson_count(course_id):
+    """Number of lessons in a course, cached until a lesson is saved or deleted"""
+    key = LESSON_COUNT_KEY.format(course_id)
+    count = cache.get(key)
+    if count is None:
+        count = Lesson.objects.filter(module__course_id=course_id).count()
+        cache.set(key, count, timeout=None)
+    return count
+
+
+def invalidate_lesson_count(course_id):
+    cache.delete(LESSON_COUNT_KEY.format(course_id))
+
+
+def touch_enrollment(enrollment):
+    """Refresh last_accessed at most once an hour for activity that does not change progress"""
+    if cache.add(ENROLLMENT_TOUCHED_KEY.format(enrollment.pk), True, ENROLLMENT_TOUCH_INTERVAL):
+        Enrollment.objects.filter(pk=enrollment.pk).update(last_accessed=timezone.now())
+
+
+def update_enrollment_progress(enrollment, delta):
+    """Apply a change in completed lessons (+1 or -1) to an enrollment
+    
+    The completed-lessons counter and the percentage move in one UPDATE against
+    the cached lesson count. Finishing the last lesson completes the enrollment
+    and awards points exactly once.
+    """
+    total_lessons = get_lesson_count(enrollment.course_id)
+    if total_lessons == 0:
+        return
+    
+    # Clamped at zero: un-completing a lesson before recount_completed_lessons has run must not go negative
+    completed_lessons = Greatest(F('completed_lessons') + delta, 0)
+    Enrollment.objects.filter(pk=enrollment.pk).update(
+        completed_lessons=completed_lessons,
+        progress_percentage=Least(Cast(completed_lessons, FloatField()) * 100 / total_lessons, 100.0),
+        last_accessed=timezone.now(),
+    )
+    enrollment.refresh_from_db(fields=['completed_lessons', 'progress_percentage', 'last_accessed'])
+    
+    if enrollment.completed_lessons >= total_lessons:
+        complete_enrollments([enrollment])
+
+
+def complete_enrollments(enrollments):
+    """Mark enrollments completed; only the ones that flip get counted and awarded points"""
+    User = get_user_model()
+    now = timezone.now()
+    
+    for enrollment in enrollments:
+        if Enrollment.objects.filter(pk=enrollment.pk, completed=False).update(completed=True, completed_at=now):
+            enrollment.completed = True
+            enrollment.completed_at = now
+            record_completion(enrollment.course_id)
+            
+            # Award points to student
+            User.objects.filter(pk=enrollment.student_id).update(points=F('points') + COMPLETION_POINTS)
+
+
+def _merge_sync_records(records):
+    """Fold replayed records into one change per lesson, later client timestamps winning"""
+    now = timezone.now()
+    merged = {}
+    for record in sorted(records, key=lambda record: record['client_timestamp']):
+        change = merged.setdefault(record['lesson_id'], {})
+        change.update({field: record[field] for field in SYNC_FIELDS if field in record})
+        # A clock running ahead must not make a record unbeatable
+        change['client_timestamp'] = min(record['client_timestamp'], now)
+    return merged
+
+
+def sync_progress(student, records):
+    """Apply a batch of offline progress records for a student
+    
+    Lessons, enrollments and existing progress rows are each loaded in one
+    query and written back with bulk_create/bulk_update. A record only applies
+    when it is newer than what the row already holds. Each affected enrollment
+    is recomputed once from its net change in completed lessons.
+    """
+    changes = _merge_sync_records(records)
+    
+    lesson_courses = dict(
+        Lesson.objects.filter(id__in=changes).values_list('id', 'module__course_id')
+    )
+    enrollments = {
+        enrollment.course_id: enrollment
+        for enrollment in Enrollment.objects.filter(
+            student=student, course_id__in=set(lesson_courses.values())
+        )
+    }
+    lesson_enrollments = {
+        lesson_id: enrollments[course_id]
+        for lesson_id, course_id in lesson_courses.items()
+        if course_id in enrollments
+    }
+    rejected = sorted(set(changes) - set(lesson_enrollments))
+    
+    deltas = {}
+    created, updated, stale = [], [], []
+    
+    with transaction.atomic():
+        existing = {
+            progress.lesson_id: progress
+            for progress in LessonProgress.objects.select_for_update().filter(
+                enrollment__in=list(enrollments.values()), lesson_id__in=list(lesson_enrollments)
+            )
+        }
+        
+        for lesson_id, enrollment in lesson_enrollments.items():
+            change = changes[lesson_id]
+            progress = existing.get(lesson_id)
+            if progress is None:
+                progress = LessonProgress(enrollment=enrollment, lesson_id=lesson_id)
+                created.append(progress)
+            elif progress.client_updated_at and progress.client_updated_at >= change['client_timestamp']:
+                stale.append(lesson_id)
+                continue
+            else:
+                updated.append(progress)
+            
+            was_completed = progress.completed
+            for field in SYNC_FIELDS:
+                if field in change:
+                    setattr(progress, field, change[field])
+            progress.client_updated_at = change['client_timestamp']
+            
+            if progress.completed and not progress.completed_at:
+                progress.completed_at = change['client_timestamp']
+            if progress.completed != was_completed:
+                deltas[enrollment.pk] = deltas.get(enrollment.pk, 0) + (1 if progress.completed else -1)
+            else:
+                deltas.setdefault(enrollment.pk, 0)
+        
+        LessonProgress.objects.bulk_create(created)
+        LessonProgress.objects.bulk_update(
+            updated,
+            ['completed', 'completed_at', 'time_spent_seconds', 'last_position_seconds', 'client_updated_at']
+        )
+    
+    affected = [enrollment for enrollment in enrollments.values() if enrollment.pk in deltas]
+    for enrollment in affected:
+        bump_progress_version(enrollment.pk)
+        if deltas[enrollment.pk]:
+            update_enrollment_progress(enrollment, deltas[enrollment.pk])
+        else:
+            touch_enrollment(enrollment)
+    
+    return {
+        'applied': len(created) + len(updated),
+        'stale': stale,
+        'rejected': rejected,
+        'enrollments': affected,
+    }
+
+
+def set_lesson_completed(progress, completed):
+    """Flip a LessonProgress completion flag; returns the change in completed lessons
+    
+    The flip is a conditional UPDATE, so of two concurrent requests completing
+    the same lesson only one sees a changed row and moves the enrollment.
+    """
+    rows = LessonProgress.objects.filter(pk=progress.pk, completed=not completed)
+    if completed:
+        changed = rows.update(completed=True, completed_at=Coalesce(F('completed_at'), Value(timezone.now())))
+    else:
+        changed = rows.update(completed=False)
+    
+    progress.refresh_from_db(fields=['completed', 'completed_at'])
+    if not changed:
+        return 0
+    return 1 if completed else -1
@@ -0,0 +1,86 @@
+# Save as: apps/courses/search.py
+
+import re
+
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, OuterRef, Q, Subquery
+from rest_framework import filters
+
+SEARCH_CONFIG = 'english'
+# Fallback icontains fields where full-text search is unavailable
+SEARCH_FIELDS = ('title', 'description', 'instructor__username')
+WORD_RE = re.compile(r'\w+')
+
+
+def search_enabled():
+    return connection.vendor == 'postgresql'
+
+
+def course_search_vector():
+    """Weighted document for a course row, usable in UPDATE statements
+    
+    Title ranks above what_you_will_learn, which ranks above the description;
+    the instructor's username is matched at the lowest weight.
+    """
+    instructor_username = Subquery(
+        get_user_model().objects.filter(pk=OuterRef('instructor_id')).values('username')[:1]
+    )
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('what_you_will_learn', weight='B', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+        + SearchVector(instructor_username, weight='D', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(queryset):
+    """Recompute search_vector for the given courses in a single UPDATE"""
+    if not search_enabled():
+        return 0
+    return queryset.update(search_vector=course_search_vector())
+
+
+def prefix_query(terms):
+    """AND of prefix matches so partially typed words still match"""
+    words = [word for term in terms for word in WORD_RE.findall(term)]
+    if not words:
+        return None
+    return SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_courses(queryset, terms):
+    """Courses matching every term, without the ranking; the rows CourseSearchFilter keeps"""
+    if search_enabled():
+        query = prefix_query(terms)
+        return queryset if query is None else queryset.filter(search_vector=query)
+    
+    for term in terms:
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f'{field}__icontains': term})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+class CourseSearchFilter(filters.SearchFilter):
+    """Full-text search over Course.search_vector ranked by ts_rank
+    
+    Falls back to SearchFilter's icontains lookups on databases without
+    full-text search, such as SQLite in tests.
+    """
+    
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or not search_enabled():
+            return super().filter_queryset(request, queryset, view)
+        
+        query = prefix_query(terms)
+        if query is None:
+            return queryset
+        
+        # CoursePagination orders by search_rank and pages it by number: ranks tie too often for a keyset
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
@@ -13,7 +13,11 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_course_count(self, obj):
-        return obj.courses.filter(status='published').count()
+        # Views that list categories annotate the count
+        count = getattr(obj, 'published_course_count', None)
+        if count is None:
+            count = obj.courses.filter(status='published').count()
+        return count
 
 
 class LessonSerializer(serializers.ModelSerializer):
@@ -32,6 +36,9 @@ class ModuleSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_lesson_count(self, obj):
+        # Reuse the lessons prefetched for `lessons`; otherwise a COUNT beats loading every row
+        if 'lessons' in getattr(obj, '_prefetched_objects_cache', {}):
+            return len(obj.lessons.all())
         return obj.lessons.count()
 
 
@@ -70,7 +77,7 @@ class CourseDetailSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Course
-        fields = '__all__'
+        exclude = ['search_vector']
     
     def get_is_enrolled(self, obj):
         request = self.context.get('request')
@@ -86,7 +93,7 @@ class EnrollmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Enrollment
         fields = '__all__'
-        read_only_fields = ['student', 'enrolled_at', 'completed_at', 'progress_percentage']
+        read_only_fields = ['student', 'enrolled_at', 'completed_at', 'progress_percentage', 'completed_lessons']
 
 
 class LessonProgressSerializer(serializers.ModelSerializer):
@@ -95,5 +102,18 @@ class LessonProgressSerializer(serializers.ModelSerializer):
     class Meta:
         model = LessonProgress
         fields = '__all__'
-        read_only_fields = ['enrollment', 'completed_at']
+        read_only_fields = ['enrollment', 'completed_at', 'client_updated_at']
+
+
+class LessonHeartbeatSerializer(serializers.Serializer):
+    last_position_seconds = serializers.IntegerField(min_value=0)
+    time_spent_seconds = serializers.IntegerField(min_value=0)
+
+
+class ProgressSyncRecordSerializer(serializers.Serializer):
+    lesson_id = serializers.IntegerField()
+    last_position_seconds = serializers.IntegerField(min_value=0, required=False)
+    time_spent_seconds = serializers.IntegerField(min_value=0, required=False)
+    completed = serializers.BooleanField(required=False)
+    client_timestamp = serializers.DateTimeField()
 ```
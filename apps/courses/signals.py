@@ -0,0 +1,93 @@
+# Save as: apps/courses/signals.py
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .detail import bump_detail_version
+from .facets import bump_facets_version
+from .models import Category, Course, Lesson, Module, Review
+from .progress import bump_structure_version, invalidate_lesson_count
+from .search import update_search_vectors
+from .suggest import bump_suggest_version
+
+SEARCHABLE_FIELDS = {'title', 'what_you_will_learn', 'description', 'instructor', 'instructor_id'}
+SUGGESTED_FIELDS = {'title', 'slug', 'status', 'instructor', 'instructor_id', 'category', 'category_id'}
+# Columns the suggest index reads from a course row
+SUGGESTED_COLUMNS = ('title', 'slug', 'status', 'instructor_id', 'category_id')
+NAME_FIELDS = ('username', 'first_name', 'last_name')
+FACETED_FIELDS = {'status', 'category', 'category_id', 'difficulty', 'language', 'is_free'}
+
+
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+def module_changed(sender, instance, **kwargs):
+    bump_structure_version(instance.course_id)
+    bump_detail_version(instance.course_id)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def lesson_changed(sender, instance, **kwargs):
+    course_id = instance.module.course_id
+    bump_structure_version(course_id)
+    bump_detail_version(course_id)
+    invalidate_lesson_count(course_id)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    bump_detail_version(instance.course_id)
+
+
+def touches(update_fields, fields):
+    return update_fields is None or bool(set(fields) & set(update_fields))
+
+
+@receiver(pre_save, sender=Course)
+def remember_suggested_columns(sender, instance, update_fields=None, **kwargs):
+    instance._suggested_before = None
+    if instance.pk and touches(update_fields, SUGGESTED_FIELDS):
+        instance._suggested_before = Course.objects.filter(pk=instance.pk).values(*SUGGESTED_COLUMNS).first()
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, update_fields=None, **kwargs):
+    # Publishing, unpublishing and renames of published courses change what the suggest index holds
+    before = getattr(instance, '_suggested_before', None) or {}
+    after = {column: getattr(instance, column) for column in SUGGESTED_COLUMNS}
+    published = 'published' in (before.get('status'), after['status'])
+    if touches(update_fields, SUGGESTED_FIELDS) and before != after and published:
+        bump_suggest_version()
+    if touches(update_fields, FACETED_FIELDS):
+        bump_facets_version()
+    if touches(update_fields, SEARCHABLE_FIELDS):
+        update_search_vectors(Course.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def catalogue_changed(sender, instance, **kwargs):
+    bump_suggest_version()
+    bump_facets_version()
+
+
+@receiver(pre_save, sender=get_user_model())
+def remember_names(sender, instance, update_fields=None, **kwargs):
+    instance._names_before = None
+    if instance.pk and touches(update_fields, NAME_FIELDS):
+        instance._names_before = sender.objects.filter(pk=instance.pk).values_list(*NAME_FIELDS).first()
+
+
+@receiver(post_save, sender=get_user_model())
+def instructor_saved(sender, instance, created, update_fields=None, **kwargs):
+    before = getattr(instance, '_names_before', None)
+    if created or before is None or before == tuple(getattr(instance, field) for field in NAME_FIELDS):
+        return
+    
+    # Search vectors hold the username; suggestions show the full name
+    if before[0] != instance.username:
+        update_search_vectors(Course.objects.filter(instructor=instance))
+    if Course.objects.filter(instructor=instance, status='published').exists():
+        bump_suggest_version()
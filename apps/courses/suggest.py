@@ -0,0 +1,163 @@
+# Save as: apps/courses/suggest.py
+
+import heapq
+import logging
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+
+from django.db import connection
+from django.db.models import Count, Q
+from .models import Category, Course
+from .progress import bump_version, get_version
+
+SUGGEST_VERSION_KEY = 'course_suggest_version'
+WORD_RE = re.compile(r'\w+')
+# Bounds the scan for very short prefixes such as a single letter
+MAX_CANDIDATES = 2000
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_index = None
+_rebuilding = False
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+
+
+def bump_suggest_version():
+    bump_version(SUGGEST_VERSION_KEY)
+
+
+class SuggestIndex:
+    """Sorted array of normalized keys searched with bisect
+    
+    Every suggestion is indexed under its full label and under each word
+    boundary in it, so "learn" finds "Machine Learning".
+    """
+    
+    def __init__(self, suggestions, version=None):
+        self.version = version
+        self.suggestions = suggestions
+        entries = set()
+        for position, suggestion in enumerate(suggestions):
+            label = normalize(suggestion['label'])
+            for match in WORD_RE.finditer(label):
+                entries.add((label[match.start():], position))
+        entries = sorted(entries)
+        self.keys = [key for key, position in entries]
+        self.positions = [position for key, position in entries]
+    
+    @classmethod
+    def build(cls, version=None):
+        suggestions = []
+        
+        courses = Course.objects.filter(status='published').with_stats().values(
+            'id', 'title', 'slug', 'enrollment_count',
+            'instructor_id', 'instructor__username', 'instructor__first_name', 'instructor__last_name'
+        )
+        instructors = {}
+        for course in courses:
+            suggestions.append({
+                'type': 'course',
+                'id': course['id'],
+                'label': course['title'],
+                'slug': course['slug'],
+                'weight': course['enrollment_count'],
+            })
+            
+            instructor = instructors.setdefault(course['instructor_id'], {
+                'type': 'instructor',
+                'id': course['instructor_id'],
+                'label': (
+                    f"{course['instructor__first_name']} {course['instructor__last_name']}".strip()
+                    or course['instructor__username']
+                ),
+                'weight': 0,
+            })
+            instructor['weight'] += course['enrollment_count']
+        suggestions.extend(instructors.values())
+        
+        categories = Category.objects.annotate(
+            published_course_count=Count('courses', filter=Q(courses__status='published'))
+        ).filter(published_course_count__gt=0).values('id', 'name', 'published_course_count')
+        for category in categories:
+            suggestions.append({
+                'type': 'category',
+                'id': category['id'],
+                'label': category['name'],
+                'weight': category['published_course_count'],
+            })
+        
+        return cls(suggestions, version)
+    
+    def search(self, prefix, n=10):
+        """Top-n suggestions whose label has a word starting with prefix, heaviest first"""
+        prefix = normalize(prefix).strip()
+        if not prefix:
+            return []
+        
+        seen = set()
+        start = bisect_left(self.keys, prefix)
+        for i in range(start, min(start + MAX_CANDIDATES, len(self.keys))):
+            if not self.keys[i].startswith(prefix):
+                break
+            seen.add(self.positions[i])
+        
+        best = heapq.nlargest(n, seen, key=lambda position: (self.suggestions[position]['weight'], -position))
+        return [
+            {field: value for field, value in self.suggestions[position].items() if field != 'weight'}
+            for position in best
+        ]
+
+
+def get_suggest_index():
+    """Process-local index, rebuilt when the catalogue version in the cache moves
+    
+    Only the first build blocks. After a version bump the stale index keeps
+    answering while one background thread per process builds the new one.
+    """
+    global _index
+    version = get_version(SUGGEST_VERSION_KEY)
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    
+    if index is None:
+        with _lock:
+            if _index is None:
+                _index = SuggestIndex.build(version)
+            return _index
+    
+    _start_rebuild(version)
+    return index
+
+
+def _start_rebuild(version):
+    global _rebuilding
+    with _lock:
+        if _rebuilding:
+            return
+        _rebuilding = True
+    threading.Thread(target=_rebuild, args=(version,), name='suggest-index-rebuild', daemon=True).start()
+
+
+def _rebuild(version):
+    global _index, _rebuilding
+    try:
+        _index = SuggestIndex.build(version)
+    except Exception:
+        # The stale index keeps serving; the next request after a failure tries again
+        logger.exception('Rebuilding the course suggest index failed')
+    finally:
+        _rebuilding = False
+        # The thread opened its own connection; do not leave it for the server to time out
+        connection.close()
+
+
+def suggest(prefix, n=10):
+    return get_suggest_index().search(prefix, n)
@@ -0,0 +1,10 @@
+# Save as: apps/courses/tasks.py
+
+from celery import shared_task
+from .heartbeats import flush_heartbeats
+
+
+@shared_task
+def flush_lesson_heartbeats():
+    """Persist buffered video position heartbeats"""
+    return flush_heartbeats()
@@ -0,0 +1,226 @@
+# Save as: apps/courses/tests.py
+
+import base64
+import json
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from redis.exceptions import ResponseError
+from rest_framework.test import APITestCase
+from . import heartbeats
+from .models import Category, Course, Enrollment, Lesson, LessonProgress, Module, Review
+
+User = get_user_model()
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CourseListQueryCountTests(APITestCase):
+    """A course list page costs the same number of queries whatever the catalogue size"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user(
+            email='instructor@example.com', username='instructor', password='password', role='instructor'
+        )
+        cls.category = Category.objects.create(name='Programming')
+        cls.students = [
+            User.objects.create_user(email=f'student{i}@example.com', username=f'student{i}', password='password')
+            for i in range(3)
+        ]
+    
+    def add_courses(self, count):
+        # bulk_create skips the catalogue signals, which are not under test here
+        start = Course.objects.count()
+        courses = Course.objects.bulk_create([
+            Course(
+                title=f'Course {i}', slug=f'course-{i}', description='Description',
+                instructor=self.instructor, category=self.category, status='published', price=i % 5
+            )
+            for i in range(start, start + count)
+        ])
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=course) for course in courses for student in self.students
+        ])
+        Review.objects.bulk_create([
+            Review(student=student, course=course, rating=4, comment='Good') for course in courses for student in self.students
+        ])
+    
+    def assert_flat(self, params, queries):
+        url = reverse('course-list')
+        for count in (5, 45):
+            self.add_courses(count - Course.objects.count())
+            with self.assertNumQueries(queries):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), min(count, 20))
+    
+    def test_newest_first_is_one_query(self):
+        self.assert_flat({}, 1)
+    
+    def test_next_keyset_page_is_one_query(self):
+        self.add_courses(45)
+        response = self.client.get(reverse('course-list'))
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 20)
+    
+    def test_price_ordering_counts_once(self):
+        self.assert_flat({'ordering': 'price'}, 2)
+    
+    def test_price_ordering_without_count_is_one_query(self):
+        self.assert_flat({'ordering': 'price', 'count': 'false'}, 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CourseKeysetPaginationTests(APITestCase):
+    """Cursors keep microseconds, so rows within one millisecond page without gaps or repeats"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user(
+            email='instructor@example.com', username='instructor', password='password', role='instructor'
+        )
+        courses = Course.objects.bulk_create([
+            Course(title=f'Course {i}', slug=f'course-{i}', description='Description',
+                   instructor=instructor, status='published')
+            for i in range(9)
+        ])
+        # Three rows share a timestamp, the rest differ only below the millisecond
+        base = timezone.now().replace(microsecond=500000)
+        offsets = [0, 0, 0, 1, 2, 250, 499, 999, 1]
+        for course, offset in zip(courses, offsets):
+            Course.objects.filter(pk=course.pk).update(created_at=base + timedelta(microseconds=offset))
+        cls.expected = list(Course.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+    
+    def walk(self, url, link):
+        seen = []
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = [course['id'] for course in response.data['results']]
+            pages.append(page)
+            seen.extend(page)
+            url = response.data[link]
+        return seen, pages
+    
+    def test_forward_pages_cover_every_row_once(self):
+        seen, pages = self.walk(reverse('course-list') + '?page_size=2', 'next')
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 5)
+    
+    def test_backward_pages_cover_every_row_once(self):
+        response = self.client.get(reverse('course-list') + '?page_size=2')
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+        last = [course['id'] for course in response.data['results']]
+        
+        _, pages = self.walk(response.data['previous'], 'previous')
+        earlier = [course_id for page in reversed(pages) for course_id in page]
+        self.assertEqual(earlier + last, self.expected)
+    
+    def test_invalid_datetime_cursor_is_not_found(self):
+        cursor = base64.urlsafe_b64encode(json.dumps({'p': [{'dt': 'yesterday'}, 1], 'r': False}).encode()).decode()
+        response = self.client.get(reverse('course-list'), {'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+
+
+class FakeRedis:
+    """The hash commands the heartbeat buffer uses, kept in memory"""
+    
+    def __init__(self):
+        self.hashes = {}
+    
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field.encode()] = value.encode()
+    
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+    
+    def hdel(self, key, *fields):
+        values = self.hashes.get(key, {})
+        for field in fields:
+            values.pop(field, None)
+        if not values:
+            self.hashes.pop(key, None)
+    
+    def exists(self, key):
+        return int(key in self.hashes)
+    
+    def rename(self, source, destination):
+        if source not in self.hashes:
+            raise ResponseError('no such key')
+        self.hashes[destination] = self.hashes.pop(source)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class FlushHeartbeatsTests(APITestCase):
+    """A batch that fails to write stays buffered until a later flush commits it"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user(
+            email='instructor@example.com', username='instructor', password='password', role='instructor'
+        )
+        student = User.objects.create_user(email='student@example.com', username='student', password='password')
+        course = Course.objects.create(title='Course', slug='course', description='Description', instructor=instructor)
+        module = Module.objects.create(course=course, title='Module')
+        cls.lessons = [Lesson.objects.create(module=module, title=f'Lesson {i}', order=i) for i in range(3)]
+        cls.enrollment = Enrollment.objects.bulk_create([Enrollment(student=student, course=course)])[0]
+    
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch.object(heartbeats, 'get_redis_connection', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for position, lesson in enumerate(self.lessons, start=1):
+            heartbeats.buffer_heartbeat(self.enrollment.id, lesson.id, position * 10, position)
+    
+    def test_failed_batch_is_kept_for_the_next_flush(self):
+        failing = (self.enrollment.id, self.lessons[1].id)
+        flush_batch = heartbeats._flush_batch
+        
+        def fail_one_batch(batch, buffered):
+            if failing in batch:
+                raise DatabaseError('connection lost')
+            return flush_batch(batch, buffered)
+        
+        with mock.patch.object(heartbeats, '_flush_batch', side_effect=fail_one_batch):
+            self.assertEqual(heartbeats.flush_heartbeats(batch_size=1), 2)
+        
+        self.assertEqual(
+            list(self.redis.hgetall(heartbeats.FLUSHING_KEY)),
+            [f'{self.enrollment.id}:{self.lessons[1].id}'.encode()]
+        )
+        self.assertEqual(LessonProgress.objects.count(), 2)
+        
+        # New heartbeats wait in the live hash while the leftover batch is retried
+        self.redis.hset(heartbeats.HEARTBEATS_KEY, f'{self.enrollment.id}:{self.lessons[0].id}', json.dumps({
+            'last_position_seconds': 99, 'time_spent_seconds': 9, 'at': time.time() + 60,
+        }))
+        self.assertEqual(heartbeats.flush_heartbeats(batch_size=1), 1)
+        self.assertFalse(self.redis.exists(heartbeats.FLUSHING_KEY))
+        self.assertEqual(LessonProgress.objects.get(lesson=self.lessons[1]).last_position_seconds, 20)
+        
+        self.assertEqual(heartbeats.flush_heartbeats(batch_size=1), 1)
+        self.assertEqual(LessonProgress.objects.get(lesson=self.lessons[0]).last_position_seconds, 99)
+        self.assertEqual(self.redis.hashes, {})
+    
+    def test_malformed_and_orphaned_entries_are_dropped(self):
+        self.redis.hset(heartbeats.HEARTBEATS_KEY, 'not-a-key', '{}')
+        self.redis.hset(heartbeats.HEARTBEATS_KEY, f'{self.enrollment.id}:999999', json.dumps({
+            'last_position_seconds': 5, 'time_spent_seconds': 5, 'at': 0,
+        }))
+        
+        self.assertEqual(heartbeats.flush_heartbeats(), 3)
+        self.assertEqual(self.redis.hashes, {})
@@ -1,18 +1,20 @@
 ```python
 from django.urls import path
 from .views import (
-    CategoryListView, CourseListView, CourseDetailView,
+    CategoryListView, CourseListView, CourseFacetsView, CourseSuggestView, CourseDetailView,
     InstructorCourseListCreateView, InstructorCourseDetailView,
     ModuleListCreateView, ModuleDetailView,
     LessonListCreateView, LessonDetailView,
     EnrollCourseView, MyEnrollmentsView,
-    LessonProgressView, CourseReviewView, MyCourseProgressView
+    LessonProgressView, ProgressSyncView, CourseReviewView, MyCourseProgressView
 )
 
 urlpatterns = [
     # Public endpoints
     path('categories/', CategoryListView.as_view(), name='category-list'),
     path('', CourseListView.as_view(), name='course-list'),
+    path('facets/', CourseFacetsView.as_view(), name='course-facets'),
+    path('suggest/', CourseSuggestView.as_view(), name='course-suggest'),
     path('<slug:slug>/', CourseDetailView.as_view(), name='course-detail'),
     path('<slug:course_slug>/reviews/', CourseReviewView.as_view(), name='course-reviews'),
     
@@ -28,6 +30,7 @@ urlpatterns = [
     path('<slug:course_slug>/enroll/', EnrollCourseView.as_view(), name='enroll-course'),
     path('student/enrollments/', MyEnrollmentsView.as_view(), name='my-enrollments'),
     path('student/lessons/<int:lesson_id>/progress/', LessonProgressView.as_view(), name='lesson-progress'),
+    path('student/progress/sync/', ProgressSyncView.as_view(), name='progress-sync'),
     path('student/<slug:course_slug>/progress/', MyCourseProgressView.as_view(), name='my-course-progress'),
 ]
 ```
@@ -3,17 +3,32 @@ from rest_framework import generics, status, permissions, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.fields import BooleanField
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django.db.models import Q, Count, Avg
 from django.utils import timezone
+from django.utils.http import parse_etags
 from .models import Category, Course, Module, Lesson, Enrollment, LessonProgress, Review
 from .serializers import (CategorySerializer, CourseListSerializer, CourseDetailSerializer,
                           ModuleSerializer, LessonSerializer, EnrollmentSerializer,
-                          LessonProgressSerializer, ReviewSerializer)
+                          LessonHeartbeatSerializer, LessonProgressSerializer, ProgressSyncRecordSerializer,
+                          ReviewSerializer)
 from apps.authentication.permissions import IsInstructorUser, IsOwnerOrReadOnly
+from .detail import SiteRequest, course_detail_queryset, render_course_detail, with_enrollment
+from .pagination import CoursePagination, NewestFirstCursorPagination
+from .search import SEARCH_FIELDS, CourseSearchFilter
+from .suggest import suggest
+from .facets import filter_courses, get_facets, normalize_filters
+from .heartbeats import buffer_heartbeat, discard_heartbeat, pending_heartbeats
+from .progress import (bump_progress_version, progress_etag, set_lesson_completed, sync_progress,
+                       touch_enrollment, update_enrollment_progress)
 
 class CategoryListView(generics.ListCreateAPIView):
-    queryset = Category.objects.all()
+    queryset = Category.objects.annotate(
+        published_course_count=Count('courses', filter=Q(courses__status='published'))
+    )
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
@@ -21,41 +36,76 @@ class CategoryListView(generics.ListCreateAPIView):
 class CourseListView(generics.ListAPIView):
     serializer_class = CourseListSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'description', 'instructor__username']
-    ordering_fields = ['created_at', 'price', 'title']
+    filter_backends = [CourseSearchFilter, filters.OrderingFilter]
+    # Used by the SQLite fallback; PostgreSQL searches Course.search_vector
+    search_fields = list(SEARCH_FIELDS)
+    ordering_fields = ['created_at', 'price', 'title', 'enrollment_count', 'rating_avg']
+    pagination_class = CoursePagination
     
     def get_queryset(self):
-        queryset = Course.objects.filter(status='published').select_related('instructor', 'category')
+        # Enrollment counts and ratings are annotated so a page costs a fixed number of queries
+        queryset = Course.objects.filter(status='published').select_related('instructor', 'category').with_stats()
         
-        # Filter by category
-        category = self.request.query_params.get('category')
-        if category:
-            queryset = queryset.filter(category__name=category)
-        
-        # Filter by difficulty
-        difficulty = self.request.query_params.get('difficulty')
-        if difficulty:
-            queryset = queryset.filter(difficulty=difficulty)
-        
-        # Filter by price
-        is_free = self.request.query_params.get('is_free')
-        if is_free is not None:
-            queryset = queryset.filter(is_free=is_free.lower() == 'true')
-        
-        return queryset
+        # Category, difficulty, language and price filters; shared with the facet counts.
+        # CourseSearchFilter applies the search itself so it can rank the results
+        catalogue_filters = normalize_filters(self.request.query_params)
+        catalogue_filters.pop('search', None)
+        return filter_courses(queryset, catalogue_filters)
+
+
+class CourseFacetsView(APIView):
+    """Facet counts for the catalogue filtered by the same params as CourseListView"""
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request):
+        return Response(get_facets(normalize_filters(request.query_params)))
+
+
+class CourseSuggestView(APIView):
+    """Typeahead over published course titles, categories and instructors"""
+    permission_classes = [permissions.AllowAny]
+    max_results = 20
+    
+    def get(self, request):
+        try:
+            n = min(int(request.query_params.get('n', 10)), self.max_results)
+        except ValueError:
+            n = 10
+        return Response(suggest(request.query_params.get('q', ''), n))
 
 
 class CourseDetailView(generics.RetrieveAPIView):
-    queryset = Course.objects.filter(status='published')
     serializer_class = CourseDetailSerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = 'slug'
     
+    def get_queryset(self):
+        return course_detail_queryset()
+    
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
+    
+    def retrieve(self, request, *args, **kwargs):
+        course = Course.objects.filter(status='published', slug=kwargs['slug']).values('id', 'updated_at').first()
+        if course is None:
+            raise Http404
+        
+        # The shared payload is rendered without a request; is_enrolled is added per request
+        payload = render_course_detail(
+            course['id'], kwargs['slug'], course['updated_at'], self.serialize_shared
+        )
+        
+        is_enrolled = request.user.is_authenticated and Enrollment.objects.filter(
+            course_id=course['id'], student=request.user
+        ).exists()
+        return HttpResponse(with_enrollment(payload, is_enrolled), content_type='application/json')
+    
+    def serialize_shared(self, course):
+        data = CourseDetailSerializer(course, context={'request': SiteRequest()}).data
+        data.pop('is_enrolled', None)
+        return data
 
 
 class InstructorCourseListCreateView(generics.ListCreateAPIView):
@@ -63,7 +113,7 @@ class InstructorCourseListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsInstructorUser]
     
     def get_queryset(self):
-        return Course.objects.filter(instructor=self.request.user)
+        return Course.objects.filter(instructor=self.request.user).prefetch_related('modules__lessons')
     
     def perform_create(self, serializer):
         serializer.save(instructor=self.request.user)
@@ -75,7 +125,7 @@ class InstructorCourseDetailView(generics.RetrieveUpdateDestroyAPIView):
     lookup_field = 'slug'
     
     def get_queryset(self):
-        return Course.objects.filter(instructor=self.request.user)
+        return Course.objects.filter(instructor=self.request.user).prefetch_related('modules__lessons')
 
 
 class ModuleListCreateView(generics.ListCreateAPIView):
@@ -84,7 +134,9 @@ class ModuleListCreateView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         course_slug = self.kwargs['course_slug']
-        return Module.objects.filter(course__slug=course_slug, course__instructor=self.request.user)
+        return Module.objects.filter(
+            course__slug=course_slug, course__instructor=self.request.user
+        ).prefetch_related('lessons')
     
     def perform_create(self, serializer):
         course = get_object_or_404(Course, slug=self.kwargs['course_slug'], instructor=self.request.user)
@@ -96,7 +148,7 @@ class ModuleDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsInstructorUser]
     
     def get_queryset(self):
-        return Module.objects.filter(course__instructor=self.request.user)
+        return Module.objects.filter(course__instructor=self.request.user).prefetch_related('lessons')
 
 
 class LessonListCreateView(generics.ListCreateAPIView):
@@ -152,57 +204,119 @@ class LessonProgressView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request, lesson_id):
-        lesson = get_object_or_404(Lesson, id=lesson_id)
-        enrollment = get_object_or_404(Enrollment, student=request.user, course=lesson.module.course)
+        write_behind = settings.LESSON_PROGRESS_WRITE_BEHIND
+        if write_behind and self.is_heartbeat(request.data):
+            return self.buffer_position(request, lesson_id)
+        
+        lesson = get_object_or_404(Lesson.objects.select_related('module'), id=lesson_id)
+        enrollment = get_object_or_404(Enrollment, student=request.user, course_id=lesson.module.course_id)
         
         progress, created = LessonProgress.objects.get_or_create(
             enrollment=enrollment,
             lesson=lesson
         )
         
+        if write_behind:
+            # Start from the latest buffered position; this write supersedes the buffered one
+            heartbeat = pending_heartbeats(enrollment.id, [lesson.id]).get(lesson.id)
+            if heartbeat:
+                progress.time_spent_seconds = heartbeat['time_spent_seconds']
+                progress.last_position_seconds = heartbeat['last_position_seconds']
+            discard_heartbeat(enrollment.id, lesson.id)
+        
+        completed = None
+        if 'completed' in request.data:
+            completed = BooleanField().to_internal_value(request.data['completed'])
+        
         # Update progress
-        progress.completed = request.data.get('completed', progress.completed)
         progress.time_spent_seconds = request.data.get('time_spent_seconds', progress.time_spent_seconds)
         progress.last_position_seconds = request.data.get('last_position_seconds', progress.last_position_seconds)
+        progress.client_updated_at = timezone.now()
+        progress.save(update_fields=['time_spent_seconds', 'last_position_seconds', 'client_updated_at'])
         
-        if progress.completed and not progress.completed_at:
-            progress.completed_at = timezone.now()
+        # Completion is flipped separately so that only the request that actually changes it counts
+        delta = set_lesson_completed(progress, completed) if completed is not None else 0
+        bump_progress_version(enrollment.id)
         
-        progress.save()
-        
-        # Update enrollment progress
-        self.update_enrollment_progress(enrollment)
+        # Only a completion flip moves the enrollment; position heartbeats stop here
+        if delta:
+            update_enrollment_progress(enrollment, delta)
+        else:
+            touch_enrollment(enrollment)
         
         serializer = LessonProgressSerializer(progress)
         return Response(serializer.data)
     
-    def update_enrollment_progress(self, enrollment):
-        total_lessons = Lesson.objects.filter(module__course=enrollment.course).count()
-        if total_lessons == 0:
-            return
+    def is_heartbeat(self, data):
+        # Anything that mentions completion is written synchronously
+        return 'completed' not in data and 'last_position_seconds' in data and 'time_spent_seconds' in data
+    
+    def buffer_position(self, request, lesson_id):
+        serializer = LessonHeartbeatSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        heartbeat = serializer.validated_data
         
-        completed_lessons = LessonProgress.objects.filter(
-            enrollment=enrollment,
-            completed=True
-        ).count()
+        enrollment = get_object_or_404(
+            Enrollment.objects.only('id'),
+            student=request.user,
+            course__modules__lessons=lesson_id
+        )
         
-        progress_percentage = (completed_lessons / total_lessons) * 100
-        enrollment.progress_percentage = progress_percentage
+        buffer_heartbeat(
+            enrollment.id,
+            lesson_id,
+            heartbeat['last_position_seconds'],
+            heartbeat['time_spent_seconds']
+        )
+        bump_progress_version(enrollment.id)
+        touch_enrollment(enrollment)
         
-        if progress_percentage == 100 and not enrollment.completed:
-            enrollment.completed = True
-            enrollment.completed_at = timezone.now()
-            
-            # Award points to student
-            enrollment.student.points += 100
-            enrollment.student.save()
+        return Response({
+            'enrollment': enrollment.id,
+            'lesson': lesson_id,
+            'last_position_seconds': heartbeat['last_position_seconds'],
+            'time_spent_seconds': heartbeat['time_spent_seconds'],
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class ProgressSyncView(APIView):
+    """Replay a batch of lesson progress records recorded while offline"""
+    permission_classes = [permissions.IsAuthenticated]
+    max_records = 500
+    
+    def post(self, request):
+        records = request.data.get('records') if isinstance(request.data, dict) else request.data
+        serializer = ProgressSyncRecordSerializer(data=records, many=True)
+        serializer.is_valid(raise_exception=True)
+        
+        if len(serializer.validated_data) > self.max_records:
+            return Response(
+                {'error': f'At most {self.max_records} records per sync'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        result = sync_progress(request.user, serializer.validated_data)
         
-        enrollment.save()
+        return Response({
+            'applied': result['applied'],
+            'stale': result['stale'],
+            'rejected': result['rejected'],
+            'enrollments': [
+                {
+                    'enrollment': enrollment.id,
+                    'course': enrollment.course_id,
+                    'progress_percentage': enrollment.progress_percentage,
+                    'completed': enrollment.completed,
+                }
+                for enrollment in result['enrollments']
+            ],
+        })
 
 
 class CourseReviewView(generics.ListCreateAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = NewestFirstCursorPagination
     
     def get_queryset(self):
         course_slug = self.kwargs['course_slug']
@@ -222,10 +336,32 @@ class MyCourseProgressView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, course_slug):
-        enrollment = get_object_or_404(Enrollment, student=request.user, course__slug=course_slug)
+        enrollment = get_object_or_404(
+            Enrollment.objects.select_related('course__instructor', 'course__category'),
+            student=request.user,
+            course__slug=course_slug
+        )
+        
+        # Polling clients send back the ETag and get a 304 until something changes
+        etag = progress_etag(enrollment)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        
+        lesson_progress = {
+            progress.lesson_id: progress
+            for progress in LessonProgress.objects.filter(enrollment=enrollment)
+        }
         
         progress_data = []
-        modules = Module.objects.filter(course=enrollment.course).prefetch_related('lessons')
+        modules = list(Module.objects.filter(course=enrollment.course).prefetch_related('lessons'))
+        
+        # Positions still sitting in the write-behind buffer are newer than the database
+        heartbeats = {}
+        if settings.LESSON_PROGRESS_WRITE_BEHIND:
+            heartbeats = pending_heartbeats(
+                enrollment.id,
+                [lesson.id for module in modules for lesson in module.lessons.all()]
+            )
         
         for module in modules:
             module_data = {
@@ -235,17 +371,15 @@ class MyCourseProgressView(APIView):
             }
             
             for lesson in module.lessons.all():
-                lesson_progress = LessonProgress.objects.filter(
-                    enrollment=enrollment,
-                    lesson=lesson
-                ).first()
+                progress = lesson_progress.get(lesson.id)
+                heartbeat = heartbeats.get(lesson.id, {})
                 
                 module_data['lessons'].append({
                     'lesson_id': lesson.id,
                     'lesson_title': lesson.title,
-                    'completed': lesson_progress.completed if lesson_progress else False,
-                    'time_spent_seconds': lesson_progress.time_spent_seconds if lesson_progress else 0,
-                    'last_position_seconds': lesson_progress.last_position_seconds if lesson_progress else 0,
+                    'completed': progress.completed if progress else False,
+                    'time_spent_seconds': heartbeat.get('time_spent_seconds', progress.time_spent_seconds if progress else 0),
+                    'last_position_seconds': heartbeat.get('last_position_seconds', progress.last_position_seconds if progress else 0),
                 })
             
             progress_data.append(module_data)
@@ -253,5 +387,5 @@ class MyCourseProgressView(APIView):
         return Response({
             'enrollment': EnrollmentSerializer(enrollment).data,
             'progress': progress_data
-        })
+        }, headers={'ETag': etag})
 ```
@@ -26,6 +26,9 @@ class Transaction(models.Model):
     class Meta:
         db_table = 'transactions'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.amount} {self.currency}"
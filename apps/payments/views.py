@@ -10,10 +10,24 @@ import stripe
 from .models import Transaction, Subscription, Coupon
 from .serializers import TransactionSerializer, SubscriptionSerializer, CouponSerializer
 from apps.courses.models import Course, Enrollment
+from apps.courses.pagination import NewestFirstCursorPagination
+from apps.analytics.counters import record_revenue
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
 
+def mark_transaction_completed(transaction, **fields):
+    """Complete a transaction once; the confirm view and the webhook may both report it"""
+    fields.update(status='completed', completed_at=timezone.now())
+    flipped = Transaction.objects.filter(pk=transaction.pk).exclude(status='completed').update(**fields)
+    
+    for name, value in fields.items():
+        setattr(transaction, name, value)
+    
+    if flipped and transaction.course_id:
+        record_revenue(transaction.course_id, transaction.amount)
+
+
 class CreatePaymentIntentView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
@@ -92,10 +106,10 @@ class ConfirmPaymentView(APIView):
             intent = stripe.PaymentIntent.retrieve(payment_intent_id)
             
             if intent.status == 'succeeded':
-                transaction.status = 'completed'
-                transaction.completed_at = timezone.now()
-                transaction.stripe_charge_id = intent.charges.data[0].id if intent.charges.data else ''
-                transaction.save()
+                mark_transaction_completed(
+                    transaction,
+                    stripe_charge_id=intent.charges.data[0].id if intent.charges.data else ''
+                )
                 
                 # Enroll user in course
                 Enrollment.objects.get_or_create(
@@ -135,9 +149,7 @@ class StripeWebhookView(APIView):
             # Update transaction status
             try:
                 transaction = Transaction.objects.get(stripe_payment_intent_id=payment_intent['id'])
-                transaction.status = 'completed'
-                transaction.completed_at = timezone.now()
-                transaction.save()
+                mark_transaction_completed(transaction)
             except Transaction.DoesNotExist:
                 pass
         
@@ -147,6 +159,7 @@ class StripeWebhookView(APIView):
 class MyTransactionsView(generics.ListAPIView):
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NewestFirstCursorPagination
     
     def get_queryset(self):
         return Transaction.objects.filter(user=self.request.user)
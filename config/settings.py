@@ -2,6 +2,7 @@
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
+from celery.schedules import crontab
 import os
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -19,6 +20,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.postgres',
     
     # Third party
     'rest_framework',
@@ -103,6 +105,8 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Absolute media URLs in cached payloads, which are rendered without a request
+SITE_URL = config('SITE_URL', default='http://localhost:8000')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -116,7 +120,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'apps.courses.pagination.OptionalCountPageNumberPagination',
     'PAGE_SIZE': 20,
 }
 
@@ -152,6 +156,28 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'train-recommendation-model': {
+        'task': 'apps.analytics.tasks.train_recommendation_model',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    'refresh-recommendations': {
+        'task': 'apps.analytics.tasks.refresh_recommendations',
+        'schedule': crontab(minute='*/15'),
+    },
+    'rebuild-course-similarity': {
+        'task': 'apps.analytics.tasks.rebuild_course_similarity',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'flush-lesson-heartbeats': {
+        'task': 'apps.courses.tasks.flush_lesson_heartbeats',
+        'schedule': 30.0,
+    },
+    'suggest-short-answer-grades': {
+        'task': 'apps.assessments.tasks.suggest_short_answer_grades',
+        'schedule': crontab(minute=30),
+    },
+}
 
 # Cache
 CACHES = {
@@ -164,6 +190,14 @@ CACHES = {
     }
 }
 
+# Recommendation engine
+RECOMMENDER_MODEL_DIR = config('RECOMMENDER_MODEL_DIR', default=str(BASE_DIR / 'ml_models'))
+RECOMMENDER_KEEP_VERSIONS = config('RECOMMENDER_KEEP_VERSIONS', default=3, cast=int)
+RECOMMENDER_NEIGHBOR_BACKEND = config('RECOMMENDER_NEIGHBOR_BACKEND', default='exact')  # 'exact' or 'lsh'
+
+# Buffer video position heartbeats in Redis and flush them in bulk from Celery
+LESSON_PROGRESS_WRITE_BEHIND = config('LESSON_PROGRESS_WRITE_BEHIND', default=False, cast=bool)
+
 # Email
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')